@@ -0,0 +1,91 @@
+# /benchmarks/synthetic_org.py
+"""Builds a synthetic AWS organization inside moto for offline benchmarks."""
+
+from datetime import datetime, timedelta, timezone
+import boto3
+
+SYNTHETIC_ROLE_NAME = "FinOpsBenchmarkRole"
+
+
+def build_synthetic_org(base_session, accounts, regions, instances, volumes, buckets, metric_days=3):
+    """
+    Creates an organization of `accounts` member accounts inside an active moto mock.
+
+    Every account gets `instances` EC2 instances and `volumes` unattached EBS volumes in
+    each region, `buckets` S3 buckets, and `metric_days` daily CPUUtilization datapoints
+    per instance.
+
+    Returns:
+    list: The member accounts in the shape returned by AWSOrgManager.get_all_accounts.
+    """
+    org_client = base_session.client('organizations')
+    org_client.create_organization(FeatureSet='ALL')
+    for idx in range(accounts):
+        org_client.create_account(AccountName=f"bench-{idx}", Email=f"bench-{idx}@example.com")
+    member_accounts = [
+        account for account in org_client.list_accounts()['Accounts']
+        if account['Name'].startswith('bench-')
+    ]
+
+    sts_client = base_session.client('sts')
+    for account in member_accounts:
+        # Resources are created with assumed-role credentials so moto files them under the member account.
+        credentials = sts_client.assume_role(
+            RoleArn=f"arn:aws:iam::{account['Id']}:role/{SYNTHETIC_ROLE_NAME}",
+            RoleSessionName="FinOpsBenchmarkSetup",
+        )['Credentials']
+        account_session = boto3.Session(
+            aws_access_key_id=credentials['AccessKeyId'],
+            aws_secret_access_key=credentials['SecretAccessKey'],
+            aws_session_token=credentials['SessionToken'],
+        )
+        for region in regions:
+            _populate_region(account_session, region, instances, volumes, metric_days)
+        s3_client = account_session.client('s3', region_name=regions[0])
+        for idx in range(buckets):
+            bucket_name = f"bench-{account['Id']}-{idx}"
+            if regions[0] == 'us-east-1':
+                s3_client.create_bucket(Bucket=bucket_name)
+            else:
+                s3_client.create_bucket(Bucket=bucket_name, CreateBucketConfiguration={'LocationConstraint': regions[0]})
+            if idx % 2 == 0:
+                s3_client.put_bucket_tagging(Bucket=bucket_name, Tagging={'TagSet': [{'Key': 'team', 'Value': 'finops'}]})
+    return member_accounts
+
+
+def _populate_region(session, region, instances, volumes, metric_days):
+    """Creates instances, unattached volumes and CPU datapoints in one account/region."""
+    ec2_client = session.client('ec2', region_name=region)
+    cw_client = session.client('cloudwatch', region_name=region)
+    instance_ids = []
+    if instances:
+        image_id = ec2_client.describe_images()['Images'][0]['ImageId']
+        # run_instances caps MaxCount per call, so launch in batches.
+        for offset in range(0, instances, 100):
+            count = min(100, instances - offset)
+            response = ec2_client.run_instances(
+                ImageId=image_id,
+                MinCount=count,
+                MaxCount=count,
+                InstanceType='m5.large',
+                TagSpecifications=[{'ResourceType': 'instance', 'Tags': [{'Key': 'Name', 'Value': 'bench'}]}],
+            )
+            instance_ids.extend(instance['InstanceId'] for instance in response['Instances'])
+    for _ in range(volumes):
+        ec2_client.create_volume(AvailabilityZone=f"{region}a", Size=20, VolumeType='gp3')
+
+    now = datetime.now(timezone.utc)
+    datapoints = [
+        {
+            'MetricName': 'CPUUtilization',
+            'Dimensions': [{'Name': 'InstanceId', 'Value': instance_id}],
+            'Timestamp': now - timedelta(days=day),
+            'Value': float((day * 7 + idx) % 100),
+        }
+        for idx, instance_id in enumerate(instance_ids)
+        for day in range(1, metric_days + 1)
+    ]
+    for offset in range(0, len(datapoints), 1000):
+        cw_client.put_metric_data(Namespace='AWS/EC2', MetricData=datapoints[offset:offset + 1000])
+
+# end of file
@@ -5,21 +5,128 @@ AWS_REGION = ["us-east-1"]
 CORE_SERVICES = [
     "s3",
     "ec2",
-    "lambda"
+    "lambda",
+    "ebs"
 ]
 
 SERVICE_MAP = {
     # Use module-qualified class references so they can be imported dynamically
     "s3": "core.s3_service:S3Service",
     "ec2": "core.ec2_service:EC2Service",
+    "lambda": "core.lambda_service:LambdaService",
+    "ebs": "core.ebs_service:EBSService",
 }
 
 AWS_PROFILE = "master9account"
 ASSUME_ROLE_NAME = "FinOpsReadWriteRole"
+# Lifetime of assumed-role credentials, and how long before expiry they are refreshed
+ASSUME_ROLE_DURATION = 3600
+CREDENTIAL_REFRESH_MARGIN = 900
+# Optional on-disk STS credential cache for repeated short runs (None disables it)
+CREDENTIAL_CACHE_FILE = None
+# botocore settings for the pooled clients created by AWSConnector.get_client
+BOTO_CLIENT_CONFIG = {
+    "max_pool_connections": 50,
+    "connect_timeout": 10,
+    "read_timeout": 60,
+    "retry_mode": "standard",
+    "max_attempts": 5,
+    "tcp_keepalive": True,
+}
+# Client-side request rate per (account, region, API family) in requests/second,
+# halved on every throttling error and recovered by 5% of the maximum per success
+RATE_LIMITS = {
+    "ec2": 20.0,
+    "cloudwatch": 20.0,
+    "s3": 50.0,
+    "lambda": 10.0,
+    "sts": 10.0,
+    "default": 10.0,
+}
+RATE_LIMIT_MIN = 0.5
+RATE_LIMIT_BACKOFF = 0.5
+RATE_LIMIT_RECOVERY = 0.05
+# Streaming mode: collectors yield pages to background writers through a bounded queue
+STREAMING_MODE = False
+STREAM_QUEUE_SIZE = 16
+STREAM_WRITERS = 2
+# Concurrency of AWSServiceRunner.run: accounts in parallel, and services per account
+MAX_WORKERS = 8
+SERVICE_WORKERS = 3
+# Multi-region mode: discover each account's enabled regions with describe_regions
+# instead of using AWS_REGION, and how many regions of one account run in parallel
+AUTO_DISCOVER_REGIONS = False
+REGION_WORKERS = 4
+# Distributed mode (main.py --coordinator / --worker): work_items claimed by worker
+# processes, each running WORK_QUEUE_WORKER_THREADS units at a time. Claims without a
+# heartbeat for WORK_QUEUE_STALE_SECONDS are requeued, up to WORK_QUEUE_MAX_ATTEMPTS claims
+WORK_QUEUE_WORKER_THREADS = 4
+WORK_QUEUE_HEARTBEAT_SECONDS = 15
+WORK_QUEUE_STALE_SECONDS = 120
+WORK_QUEUE_MAX_ATTEMPTS = 3
+WORK_QUEUE_POLL_SECONDS = 5
+# Services with account-wide APIs, collected only once per account in the home region
+GLOBAL_SERVICES = ["s3"]
 ENABLE_SERVICESNOW = False
 LOG_LEVEL = "INFO"
+# Parquet snapshot of every run's EC2/S3/Lambda/EBS records, partitioned by run date/account/region
+# (needs pyarrow; skipped with a warning when it is not installed)
+SNAPSHOT_ENABLED = True
+SNAPSHOT_DIR = "snapshots"
+# Rows buffered per partition before they are written out as one Parquet row group
+SNAPSHOT_ROW_GROUP_ROWS = 50000
+# History mode: append every run's EC2 records to the monthly-partitioned
+# ec2_instance_history table; partitions older than the retention are dropped
+HISTORY_ENABLED = True
+HISTORY_RETENTION_DAYS = 400
+HISTORY_PARTITIONS_AHEAD = 1
+# How far back an "as of" query looks for the latest run of each account/region
+HISTORY_ASOF_LOOKBACK_DAYS = 7
+# Rightsizing analysis after each run, CPU thresholds in percent
+# (idle: stop; underutilized: two sizes down; oversized: one size down)
+# mv_ec2_fleet_summary.idle_count is built from idle_avg/idle_max by a migration:
+# changing them needs a new migration recreating the view.
+RIGHTSIZING_ENABLED = True
+RIGHTSIZING_THRESHOLDS = {
+    "idle_avg": 2.0,
+    "idle_max": 5.0,
+    "underutilized_avg": 10.0,
+    "underutilized_max": 40.0,
+    "oversized_max": 50.0,
+}
+# Local AWS EC2 price list (bulk offer JSON or CSV) for the cost estimates; None disables them.
+# The parsed catalog is cached in PRICE_CACHE_DIR until the file changes.
+PRICE_LIST_FILE = None
+PRICE_CACHE_DIR = "cache"
+HOURS_PER_MONTH = 730
+# Record every (account, region, service) unit of a run in the run_ledger table,
+# so an interrupted run can be finished with `main.py --resume`
+RUN_LEDGER_ENABLED = True
+# Directory for the machine-readable run report (API calls, latencies, DB timings)
+TELEMETRY_REPORT_DIR = "logs"
 
 #Free metric capture
 METRIC_NAME = 'CPUUtilization'
 DAYS_LIST = [30, 60]
+# Metric queries packed into each GetMetricData call (max 500)
+METRIC_BATCH_SIZE = 500
+# Keep per-instance daily rollups in instance_metric_daily and only fetch missing days
+METRIC_ROLLUP_ENABLED = True
+METRIC_ROLLUP_RETENTION_DAYS = 400
+# CloudWatch keeps accepting late datapoints: the last complete days are always refetched
+METRIC_ROLLUP_REFETCH_DAYS = 2
+# Stored days without datapoints are fetched again while they are this recent
+METRIC_ROLLUP_EMPTY_RECHECK_DAYS = 7
+# Window of the Lambda invocation/error/throttle/duration metrics
+LAMBDA_METRIC_DAYS = 30
+# Unattached EBS volumes detached for at least this many days are flagged long_detached
+EBS_LONG_DETACHED_DAYS = 30
+# How long one account/region describe_volumes sweep is shared by the EC2 and EBS collectors
+VOLUME_SWEEP_TTL_SECONDS = 900
+# Threads fetching location, versioning, tagging and lifecycle per S3 bucket
+S3_ENRICH_WORKERS = 16
+# Log every SQL statement (SQLAlchemy echo); the engine is created on first use
+DB_ECHO = False
+# Rows per multi-row INSERT ... ON CONFLICT statement when syncing inventory
+DB_BATCH_SIZE = 500
 # End-of-file (EOF)
@@ -1,17 +1,46 @@
 # /core/aws_connector.py
 """This module provides a class to handle AWS connections and role assumptions."""
 
+from datetime import datetime, timedelta, timezone
 from typing import Optional
+import json
+import os
+import threading
 import boto3
+from botocore.config import Config
+from botocore.credentials import CredentialProvider, CredentialResolver, RefreshableCredentials
+from botocore.session import get_session as get_botocore_session
+from core.rate_limiter import RateLimiterRegistry
+from core.volume_sweep import VolumeSweepCache
 from utils.logger import logger
+from utils.telemetry import telemetry
+import config
 
 class AWSConnector:
     """A class to handle AWS connections and role assumptions."""
-    
-    def __init__(self, region_name:Optional[str] = None) -> None:
-        """Initialize the AWS Connector with a specific region."""
+
+    def __init__(self, region_name:Optional[str] = None, credential_cache_file: Optional[str] = None) -> None:
+        """Initialize the AWS Connector with a specific region.
+
+        Assumed-role sessions are cached per (account_id, role_name) and refresh their
+        credentials before they expire. If credential_cache_file (or
+        config.CREDENTIAL_CACHE_FILE) is set, credentials are also persisted there so
+        repeated short runs can skip STS entirely.
+        """
         self.region_name = region_name
-        
+        self.credential_cache_file = credential_cache_file or config.CREDENTIAL_CACHE_FILE
+        # boto3 sessions are not thread-safe; serialise client creation on shared sessions.
+        self._client_lock = threading.Lock()
+        self._cache_lock = threading.Lock()
+        self._disk_lock = threading.Lock()
+        self._role_locks = {}
+        self._session_cache = {}
+        self._client_cache = {}
+        self.client_config = build_client_config()
+        self.rate_limiter = RateLimiterRegistry()
+        # describe_volumes sweeps shared by the collectors of each account and region.
+        self.volume_sweeps = VolumeSweepCache()
+
     def get_session(self, profile_name: Optional[str] = None):
         """Create a boto3 session with the specified profile and region."""
         return boto3.Session(
@@ -19,26 +48,157 @@ class AWSConnector:
             region_name=self.region_name
         )
 
+    def get_client(self, session, service_name: str, region_name: Optional[str] = None, account_id: Optional[str] = None):
+        """Returns a pooled client for (account, region, service), creating it on first use.
+
+        Clients are thread-safe and expensive to build, so every collector for the same
+        account and region shares one, configured with config.BOTO_CLIENT_CONFIG and
+        throttled by the shared rate limiter.
+        """
+        region_name = region_name or session.region_name or self.region_name
+        key = (account_id or id(session), region_name, service_name)
+        client = self._client_cache.get(key)
+        if client is None:
+            with self._client_lock:
+                client = self._client_cache.get(key)
+                if client is None:
+                    client = session.client(service_name, region_name=region_name, config=self.client_config)
+                    self.rate_limiter.register(client, account_id, region_name)
+                    telemetry.register(client, account_id, region_name)
+                    self._client_cache[key] = client
+        return client
+
     def assume_role(self, account_id: str, role_name: str, session=None):
-        """Assumes a role in the specified AWS account."""
-        if not session:
-            session = boto3.Session(region_name=self.region_name)
-        sts_client = session.client('sts')
-        try:
-            role_arn = f"arn:aws:iam::{account_id}:role/{role_name}"
-            logger.info("Assuming role %s in account %s", role_name, account_id)
-            response = sts_client.assume_role(
-                RoleArn=role_arn,
-                RoleSessionName="FinOpsSession"
-            )
-            credentials = response['Credentials']
-            logger.info("Assumed role %s successfully", role_name)
-            return boto3.Session(
-                aws_access_key_id=credentials['AccessKeyId'],
-                aws_secret_access_key=credentials['SecretAccessKey'],
-                aws_session_token=credentials['SessionToken'],
-                region_name=self.region_name
-            )
-        except Exception as e:
-            logger.error("Failed to assume role %s in account %s: %s", role_name, account_id, e)
-            return None                   
\ No newline at end of file
+        """Assumes a role in the specified AWS account.
+
+        Returns a cached session when one exists for (account_id, role_name), so the
+        same credentials are shared across regions and services.
+        """
+        key = (account_id, role_name)
+        with self._cache_lock:
+            role_lock = self._role_locks.setdefault(key, threading.Lock())
+        # Per-role lock: concurrent callers for the same account wait for one STS call.
+        with role_lock:
+            cached_session = self._session_cache.get(key)
+            if cached_session is not None:
+                return cached_session
+            if not session:
+                session = boto3.Session(region_name=self.region_name)
+            try:
+                metadata = self._get_role_credentials(account_id, role_name, session)
+                credentials = RefreshableCredentials.create_from_metadata(
+                    metadata=metadata,
+                    refresh_using=lambda: self._get_role_credentials(account_id, role_name, session, force_refresh=True),
+                    method='sts-assume-role',
+                )
+                botocore_session = get_botocore_session()
+                # The role's credentials are the session's only credential source.
+                botocore_session.register_component(
+                    'credential_provider', CredentialResolver(providers=[AssumedRoleCredentialProvider(credentials)])
+                )
+                account_session = boto3.Session(botocore_session=botocore_session, region_name=self.region_name)
+            except Exception as e:
+                logger.error("Failed to assume role %s in account %s: %s", role_name, account_id, e)
+                return None
+            self._session_cache[key] = account_session
+            return account_session
+
+    def _get_role_credentials(self, account_id: str, role_name: str, session, force_refresh: bool = False):
+        """Returns credential metadata for the role from the disk cache or STS.
+
+        Disk entries are reused while they stay valid for more than
+        config.CREDENTIAL_REFRESH_MARGIN seconds. botocore calls this again with
+        force_refresh=True shortly before the in-memory credentials expire.
+        """
+        cache_key = f"{account_id}:{role_name}"
+        if not force_refresh:
+            cached = self._read_disk_cache().get(cache_key)
+            if cached and not _expires_within(cached['expiry_time'], config.CREDENTIAL_REFRESH_MARGIN):
+                logger.info("Reusing cached credentials for role %s in account %s", role_name, account_id)
+                return cached
+
+        sts_client = self.get_client(session, 'sts')
+        role_arn = f"arn:aws:iam::{account_id}:role/{role_name}"
+        logger.info("Assuming role %s in account %s", role_name, account_id)
+        response = sts_client.assume_role(
+            RoleArn=role_arn,
+            RoleSessionName="FinOpsSession",
+            DurationSeconds=config.ASSUME_ROLE_DURATION,
+        )
+        credentials = response['Credentials']
+        logger.info("Assumed role %s successfully", role_name)
+        metadata = {
+            'access_key': credentials['AccessKeyId'],
+            'secret_key': credentials['SecretAccessKey'],
+            'token': credentials['SessionToken'],
+            'expiry_time': credentials['Expiration'].isoformat(),
+        }
+        self._write_disk_cache(cache_key, metadata)
+        return metadata
+
+    def _read_disk_cache(self):
+        """Loads the on-disk credential cache, or an empty dict if disabled or unreadable."""
+        if not self.credential_cache_file:
+            return {}
+        with self._disk_lock:
+            try:
+                with open(self.credential_cache_file, encoding='utf-8') as cache_file:
+                    return json.load(cache_file)
+            except FileNotFoundError:
+                return {}
+            except (OSError, ValueError) as e:
+                logger.warning("Ignoring unreadable credential cache %s: %s", self.credential_cache_file, e)
+                return {}
+
+    def _write_disk_cache(self, cache_key: str, metadata: dict) -> None:
+        """Stores credentials in the on-disk cache, readable by the current user only."""
+        if not self.credential_cache_file:
+            return
+        entries = self._read_disk_cache()
+        entries[cache_key] = metadata
+        # Drop expired entries so the file does not grow without bound.
+        entries = {key: value for key, value in entries.items() if not _expires_within(value['expiry_time'], 0)}
+        with self._disk_lock:
+            try:
+                cache_dir = os.path.dirname(self.credential_cache_file)
+                if cache_dir:
+                    os.makedirs(cache_dir, exist_ok=True)
+                tmp_path = f"{self.credential_cache_file}.tmp"
+                fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+                with os.fdopen(fd, 'w', encoding='utf-8') as cache_file:
+                    json.dump(entries, cache_file)
+                os.replace(tmp_path, self.credential_cache_file)
+            except OSError as e:
+                logger.warning("Failed to write credential cache %s: %s", self.credential_cache_file, e)
+
+
+class AssumedRoleCredentialProvider(CredentialProvider):
+    """Credential provider handing botocore the refreshable credentials of an assumed role."""
+    METHOD = 'sts-assume-role'
+
+    def __init__(self, credentials):
+        super().__init__()
+        self.credentials = credentials
+
+    def load(self):
+        return self.credentials
+
+
+def build_client_config() -> Config:
+    """Builds the botocore Config shared by all pooled clients from config.BOTO_CLIENT_CONFIG."""
+    settings = config.BOTO_CLIENT_CONFIG
+    return Config(
+        max_pool_connections=settings['max_pool_connections'],
+        connect_timeout=settings['connect_timeout'],
+        read_timeout=settings['read_timeout'],
+        retries={'mode': settings['retry_mode'], 'max_attempts': settings['max_attempts']},
+        tcp_keepalive=settings['tcp_keepalive'],
+    )
+
+
+def _expires_within(expiry_time: str, seconds: int) -> bool:
+    """Returns True if the ISO-8601 expiry_time is less than `seconds` away."""
+    expiry = datetime.fromisoformat(expiry_time)
+    if expiry.tzinfo is None:
+        expiry = expiry.replace(tzinfo=timezone.utc)
+    return expiry - datetime.now(timezone.utc) < timedelta(seconds=seconds)
@@ -0,0 +1,121 @@
+# /core/cloudwatch_metrics.py
+"""Batched CloudWatch metric collection built on GetMetricData."""
+
+from datetime import datetime, timedelta, timezone
+from utils.logger import logger
+import config
+
+# GetMetricData accepts at most 500 queries per request.
+MAX_QUERIES_PER_CALL = 500
+STATISTICS = ['Average', 'Maximum', 'Minimum']
+
+
+def get_metric_data_batched(cw_client, queries, start_time, end_time, batch_size=None):
+    """
+    Run many metric queries through as few GetMetricData calls as possible.
+
+    Args:
+    cw_client: boto3 CloudWatch client.
+    queries (list): Dicts with 'key', 'namespace', 'metric_name', 'dimensions',
+        'stat' and 'period'. 'key' is any hashable used to identify the result.
+    start_time (datetime): Start of the window shared by every query.
+    end_time (datetime): End of the window shared by every query.
+    batch_size (int): Queries per call, capped at 500.
+
+    Returns:
+    dict: Maps each query key to the list of (timestamp, value) pairs returned,
+        oldest first. Keys whose call failed map to None.
+    """
+    batch_size = min(batch_size or config.METRIC_BATCH_SIZE, MAX_QUERIES_PER_CALL)
+    results = {}
+    for offset in range(0, len(queries), batch_size):
+        chunk = queries[offset:offset + batch_size]
+        # Query ids must start with a lowercase letter and be unique per call.
+        id_map = {f"q{idx}": query['key'] for idx, query in enumerate(chunk)}
+        metric_queries = [
+            {
+                'Id': f"q{idx}",
+                'MetricStat': {
+                    'Metric': {
+                        'Namespace': query['namespace'],
+                        'MetricName': query['metric_name'],
+                        'Dimensions': query['dimensions'],
+                    },
+                    'Period': query['period'],
+                    'Stat': query['stat'],
+                },
+                'ReturnData': True,
+            }
+            for idx, query in enumerate(chunk)
+        ]
+        for key in id_map.values():
+            results[key] = []
+        try:
+            paginator = cw_client.get_paginator('get_metric_data')
+            for page in paginator.paginate(
+                MetricDataQueries=metric_queries,
+                StartTime=start_time,
+                EndTime=end_time,
+                ScanBy='TimestampAscending',
+            ):
+                for result in page.get('MetricDataResults', []):
+                    key = id_map.get(result['Id'])
+                    if key is None:
+                        continue
+                    results[key].extend(zip(result.get('Timestamps', []), result.get('Values', [])))
+        except Exception as e:
+            logger.error("Error retrieving metric data batch of %s queries: %s", len(chunk), e)
+            for key in id_map.values():
+                results[key] = None
+    return results
+
+
+def collect_metric_aggregates_batch(cw_client, instance_ids, metric_name, days_list, region, namespace='AWS/EC2'):
+    """
+    Collect aggregated metric data for many EC2 instances at once.
+
+    One query is issued per (instance, statistic) with the period set to the whole
+    window, so each query yields a single datapoint. Windows of different length
+    need different start times and are therefore sent as separate batches.
+
+    Args:
+    instance_ids (list): The IDs of the EC2 instances.
+    metric_name (str): The metric to collect (e.g., 'CPUUtilization').
+    days_list (list): A list of durations in days (e.g., [30, 60]).
+    region (str): AWS region.
+
+    Returns:
+    dict: Maps each instance ID to the same structure returned by
+        collect_metric_aggregates: {days: {'Average': .., 'Maximum': .., 'Minimum': ..}}
+        with 'N/A' where no data was found.
+    """
+    aggregated = {instance_id: {} for instance_id in instance_ids}
+    if not instance_ids:
+        return aggregated
+    end_time = datetime.now(timezone.utc)
+    for days in days_list:
+        start_time = end_time - timedelta(days=days)
+        period = days * 86400
+        queries = [
+            {
+                'key': (instance_id, stat),
+                'namespace': namespace,
+                'metric_name': metric_name,
+                'dimensions': [{'Name': 'InstanceId', 'Value': instance_id}],
+                'stat': stat,
+                'period': period,
+            }
+            for instance_id in instance_ids
+            for stat in STATISTICS
+        ]
+        values = get_metric_data_batched(cw_client, queries, start_time, end_time)
+        for instance_id in instance_ids:
+            period_data = {}
+            for stat in STATISTICS:
+                datapoints = values.get((instance_id, stat))
+                period_data[stat] = datapoints[0][1] if datapoints else 'N/A'
+            aggregated[instance_id][days] = period_data
+    logger.info("Collected %s metric aggregates for %s instances in region %s", metric_name, len(instance_ids), region)
+    return aggregated
+
+# end of file
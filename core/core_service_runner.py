@@ -1,68 +1,365 @@
 # /core/core_service_runner.py
 
 from utils.logger import logger
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from core.pipeline import RecordPipeline
 import config
 import importlib
 
 class AWSServiceRunner:
     """Runner class to manage AWS services."""
     
-    def __init__(self, base_session, connector, region, services, accounts, role_name):
+    def __init__(self, base_session, connector, region, services, accounts, role_name, run_id=None, sinks=None, ledger=None):
         self.base_session = base_session
         self.connector = connector
         self.region = region
         self.services = services
         self.accounts = accounts
         self.role_name = role_name
-        # Ensure SERVICE_MAP entries are actual callables (classes), not strings.
-        # config.SERVICE_MAP may contain class names as strings; replace them
-        # with the module-level imported classes (S3Service, EC2Service, ...)
+        self.run_id = run_id
+        # Record sinks are called as sink(service, account_id, region, records) for every
+        # collected page, e.g. the Parquet SnapshotExporter.
+        self.sinks = list(sinks or [])
+        # Optional db.run_ledger.RunLedger: units it already lists as done are skipped and
+        # every unit's state, timing and record count is recorded in it.
+        self.ledger = ledger
+        self._pipeline = None
+        # Service classes resolved so far; config.SERVICE_MAP entries are only imported
+        # by _service_class() when a run first needs them, so unrequested plugins are
+        # never loaded.
         self.SERVICE_MAP = {}
-        for name, val in config.SERVICE_MAP.items():
-            resolved = None
-            if isinstance(val, str):
-                # support module-qualified string like 'core.s3_service:S3Service'
-                if ':' in val:
-                    module_path, cls_name = val.split(':', 1)
-                    try:
-                        module = importlib.import_module(module_path)
-                        resolved = getattr(module, cls_name, None)
-                        if resolved is None:
-                            logger.warning("Class %s not found in module %s for service %s", cls_name, module_path, name)
-                    except (ImportError, AttributeError) as e:
-                        logger.exception("Failed importing %s for service %s: %s", val, name, e)
-                else:
-                    # fallback: try resolving simple class name from globals
-                    resolved = globals().get(val)
-                    if resolved is None:
-                        logger.warning("Service class '%s' for key '%s' not found in globals", val, name)
-            else:
-                resolved = val
-            self.SERVICE_MAP[name] = resolved
     
-    def run(self):
-        """Runs the specified AWS services."""
+    def run(self, max_workers=None, service_workers=None, streaming=None):
+        """Runs the specified AWS services.
+
+        Accounts are processed by a pool of max_workers threads (config.MAX_WORKERS by
+        default) and the services of one account by service_workers threads
+        (config.SERVICE_WORKERS). A value of 1 keeps the sequential behaviour. Errors are
+        isolated per account and per service, so one failure never aborts the others.
+
+        In streaming mode (config.STREAMING_MODE by default) collectors yield pages that
+        flow through a bounded RecordPipeline to background writers, and only a summary
+        is kept per service instead of the records.
+
+        Returns:
+            dict: {account_id: {service: fetch_properties() result}} in account order, or
+            {account_id: {service: summary dict}} in streaming mode.
+        """
+        results = self.run_regions(
+            [self.region], discover=False, probe=False,
+            max_workers=max_workers, region_workers=1, service_workers=service_workers, streaming=streaming,
+        )
+        return results.get(self.region, {})
+
+    def run_regions(self, regions=None, discover=None, probe=True, max_workers=None, region_workers=None,
+                    service_workers=None, streaming=None):
+        """Runs the specified AWS services in several regions of every account.
+
+        regions defaults to [self.region]. With discover (config.AUTO_DISCOVER_REGIONS by
+        default) each account's enabled regions are read with describe_regions and, when
+        regions is given, restricted to it. The regions of one account run on
+        region_workers threads (config.REGION_WORKERS). With probe, every service's
+        has_resources() check runs first and a region is skipped for the services that
+        have nothing there. Services in config.GLOBAL_SERVICES run only once per account,
+        in self.region (the home region) or the account's first region without it.
+
+        Returns:
+            dict: {region: {account_id: {service: result}}}, with results as in run().
+        """
+        max_workers = config.MAX_WORKERS if max_workers is None else max_workers
+        region_workers = config.REGION_WORKERS if region_workers is None else region_workers
+        service_workers = config.SERVICE_WORKERS if service_workers is None else service_workers
+        streaming = config.STREAMING_MODE if streaming is None else streaming
+        discover = config.AUTO_DISCOVER_REGIONS if discover is None else discover
+        if not regions and not discover:
+            regions = [self.region]
+        self._pipeline = RecordPipeline() if streaming else None
+        region_results_by_id = {}
+        if max_workers <= 1:
+            for account in self.accounts:
+                region_results_by_id[account["Id"]] = self._run_account_safely(
+                    account, regions, discover, probe, region_workers, service_workers
+                )
+        else:
+            with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="finops-account") as executor:
+                futures = {
+                    executor.submit(
+                        self._run_account_safely, account, regions, discover, probe, region_workers, service_workers
+                    ): account["Id"]
+                    for account in self.accounts
+                }
+                for future in as_completed(futures):
+                    region_results_by_id[futures[future]] = future.result()
+
+        if self._pipeline is not None:
+            summaries = self._pipeline.close()
+            self._pipeline = None
+            for account_id, region_results in region_results_by_id.items():
+                for region, account_results in (region_results or {}).items():
+                    for service in list(account_results):
+                        account_results[service] = summaries.get((account_id, region, service), account_results[service])
+                        # Streaming units are only complete once the writers have flushed them.
+                        if self.ledger is not None:
+                            summary = account_results[service]
+                            self.ledger.finish(
+                                account_id, region, service,
+                                'failed' if summary.get('write_errors') else 'done',
+                                records=summary.get('records'),
+                                error=f"{summary['write_errors']} page writes failed" if summary.get('write_errors') else None,
+                            )
+
         results = {}
         for account in self.accounts:
-            account_id = account["Id"]
-            logger.info("Running services for account: %s in region %s", account_id, self.region)
-            account_session = self.connector.assume_role(
-                    account_id, self.role_name, self.base_session
-                )
-            if not account_session:
-                logger.error("Failed to assume role for account %s", account_id)
+            for region, account_results in (region_results_by_id.get(account["Id"]) or {}).items():
+                if account_results:
+                    results.setdefault(region, {})[account["Id"]] = account_results
+        return results
+
+    def _run_account_safely(self, account, regions, discover, probe, region_workers, service_workers):
+        """Runs _run_account and logs instead of raising, so one account cannot abort the run."""
+        try:
+            return self._run_account(account, regions, discover, probe, region_workers, service_workers)
+        except Exception as e:
+            logger.exception("Unexpected error running services for account %s: %s", account["Id"], e)
+            return None
+
+    def _run_account(self, account, regions, discover, probe, region_workers, service_workers):
+        """Assumes the role in one account and runs every requested service in each of its regions."""
+        account_id = account["Id"]
+        account_session = self.connector.assume_role(
+                account_id, self.role_name, self.base_session
+            )
+        if not account_session:
+            logger.error("Failed to assume role for account %s", account_id)
+            return None
+
+        account_regions = self._discover_regions(account_session, account_id, regions) if discover else list(regions)
+        if not account_regions:
+            logger.warning("No regions to run for account %s", account_id)
+            return None
+        global_region = self.region if self.region in account_regions else account_regions[0]
+
+        region_results = {}
+        if region_workers <= 1 or len(account_regions) <= 1:
+            for region in account_regions:
+                region_results[region] = self._run_region_safely(account_session, account_id, region, global_region, probe, service_workers)
+        else:
+            with ThreadPoolExecutor(max_workers=region_workers, thread_name_prefix=f"finops-{account_id}-region") as executor:
+                futures = {
+                    region: executor.submit(
+                        self._run_region_safely, account_session, account_id, region, global_region, probe, service_workers
+                    )
+                    for region in account_regions
+                }
+                for region, future in futures.items():
+                    region_results[region] = future.result()
+        return {region: results for region, results in region_results.items() if results}
+
+    def _discover_regions(self, account_session, account_id, regions=None):
+        """Returns the regions enabled in the account, restricted to `regions` when given.
+
+        Falls back to `regions` (or the home region) if describe_regions fails.
+        """
+        try:
+            client = self.connector.get_client(account_session, 'ec2', region_name=self.region, account_id=account_id)
+            enabled = sorted(region['RegionName'] for region in client.describe_regions(AllRegions=False)['Regions'])
+        except Exception as e:
+            logger.error("Region discovery failed for account %s: %s", account_id, e)
+            return list(regions or [self.region])
+        if regions:
+            enabled = [region for region in enabled if region in regions]
+        logger.info("Discovered %s enabled regions for account %s", len(enabled), account_id)
+        return enabled
+
+    def _run_region_safely(self, account_session, account_id, region, global_region, probe, service_workers):
+        """Runs _run_region and logs instead of raising, so one region cannot abort the account."""
+        try:
+            return self._run_region(account_session, account_id, region, global_region, probe, service_workers)
+        except Exception as e:
+            logger.exception("Unexpected error running services for account %s in region %s: %s", account_id, region, e)
+            return None
+
+    def _run_region(self, account_session, account_id, region, global_region, probe, service_workers):
+        """Runs every requested service for one account in one region."""
+        logger.info("Running services for account: %s in region %s", account_id, region)
+        services = []
+        for service in self.services:
+            if service in config.GLOBAL_SERVICES and region != global_region:
+                continue
+            if not self._service_class(service):
+                logger.warning("Service %s is not supported", service)
                 continue
-            account_results = {}
-            for service in self.services:
-                svc_cls = self.SERVICE_MAP.get(service)
-                if not svc_cls:
-                    logger.warning("Service %s is not supported", service)
+            if self.ledger is not None and self.ledger.is_completed(account_id, region, service):
+                logger.info("Service %s already completed for account %s in region %s, skipping", service, account_id, region)
+                continue
+            services.append(service)
+        if self.ledger is not None:
+            self.ledger.mark_pending([(account_id, region, service) for service in services])
+
+        # Services are created here, in the region thread; only fetch_properties runs on
+        # the service workers.
+        svc_instances = {}
+        for service in services:
+            svc_cls = self._service_class(service)
+            if probe and not svc_cls.has_resources(account_session, region, connector=self.connector, account_id=account_id):
+                logger.info("No %s resources for account %s in region %s, skipping", service, account_id, region)
+                if self.ledger is not None:
+                    self.ledger.finish(account_id, region, service, 'skipped', records=0)
+                continue
+            try:
+                svc_instances[service] = self._create_service(service, account_session, account_id, region)
+            except Exception as e:
+                logger.exception("Failed to initialise service %s for account %s: %s", service, account_id, e)
+                if self.ledger is not None:
+                    self.ledger.finish(account_id, region, service, 'failed', error=e)
+
+        account_results = {}
+        if service_workers <= 1 or len(svc_instances) <= 1:
+            for service, svc_instance in svc_instances.items():
+                account_results[service] = self._fetch_service(service, svc_instance, account_id, region)
+        else:
+            with ThreadPoolExecutor(max_workers=service_workers, thread_name_prefix=f"finops-{account_id}-{region}") as executor:
+                futures = {
+                    service: executor.submit(self._fetch_service, service, svc_instance, account_id, region)
+                    for service, svc_instance in svc_instances.items()
+                }
+                for service, future in futures.items():
+                    account_results[service] = future.result()
+        return {service: data for service, data in account_results.items() if data is not None}
+
+    def plan_units(self, regions=None, discover=None):
+        """Returns the (account_id, region, service) units a run_regions() call would cover.
+
+        Regions are resolved as in run_regions() and global services are placed in one
+        region per account, but nothing is probed or collected. Accounts whose role
+        cannot be assumed (only needed with discover) are left out.
+        """
+        discover = config.AUTO_DISCOVER_REGIONS if discover is None else discover
+        if not regions and not discover:
+            regions = [self.region]
+        services = [service for service in self.services if self._service_class(service)]
+        units = []
+        for account in self.accounts:
+            account_id = account["Id"]
+            if discover:
+                account_session = self.connector.assume_role(account_id, self.role_name, self.base_session)
+                if not account_session:
+                    logger.error("Failed to assume role for account %s", account_id)
                     continue
-                svc_instance = (
-                    svc_cls(account_session, self.region, account_id)
-                    if service != "s3"
-                    else svc_cls(account_session, account_id)
+                account_regions = self._discover_regions(account_session, account_id, regions)
+            else:
+                account_regions = list(regions)
+            if not account_regions:
+                continue
+            global_region = self.region if self.region in account_regions else account_regions[0]
+            for region in account_regions:
+                units.extend(
+                    (account_id, region, service) for service in services
+                    if service not in config.GLOBAL_SERVICES or region == global_region
                 )
-                account_results[service] = svc_instance.fetch_properties()
-                results[account_id] = account_results
-        return results    
\ No newline at end of file
+        return units
+
+    def run_unit(self, account, region, service):
+        """Runs one (account, region, service) unit synchronously, without probing.
+
+        Returns:
+            The service's fetch_properties() result, or None if the unit failed.
+        """
+        account_id = account["Id"]
+        if not self._service_class(service):
+            logger.warning("Service %s is not supported", service)
+            return None
+        account_session = self.connector.assume_role(account_id, self.role_name, self.base_session)
+        if not account_session:
+            logger.error("Failed to assume role for account %s", account_id)
+            if self.ledger is not None:
+                self.ledger.finish(account_id, region, service, 'failed', error="assume role failed")
+            return None
+        try:
+            svc_instance = self._create_service(service, account_session, account_id, region)
+        except Exception as e:
+            logger.exception("Failed to initialise service %s for account %s: %s", service, account_id, e)
+            if self.ledger is not None:
+                self.ledger.finish(account_id, region, service, 'failed', error=e)
+            return None
+        return self._fetch_service(service, svc_instance, account_id, region)
+
+    def _service_class(self, service):
+        """Returns the class of a service, importing its module on first use, or None."""
+        if service not in self.SERVICE_MAP:
+            self.SERVICE_MAP[service] = resolve_service_class(service, config.SERVICE_MAP.get(service))
+        return self.SERVICE_MAP[service]
+
+    def _create_service(self, service, account_session, account_id, region):
+        svc_cls = self._service_class(service)
+        if service == "s3":
+            return svc_cls(account_session, account_id, connector=self.connector)
+        return svc_cls(account_session, region, account_id, connector=self.connector)
+
+    def _fetch_service(self, service, svc_instance, account_id, region):
+        """Runs fetch_properties for one service, returning None if it raised or failed.
+
+        Collectors report a failed collection by returning None; it is recorded as a
+        failed unit, never as done with no records.
+
+        In streaming mode the service's pages are handed to the pipeline instead and a
+        record count is returned until the writers' summary replaces it.
+        """
+        if self.ledger is not None:
+            self.ledger.start(account_id, region, service)
+        try:
+            if self._pipeline is not None:
+                records = 0
+                for page_records in svc_instance.iter_pages():
+                    self._pipeline.submit((account_id, region, service), svc_instance.write_records, page_records)
+                    self._emit(service, account_id, region, page_records)
+                    records += len(page_records)
+                return {'records': records}
+            data = svc_instance.fetch_properties()
+            if data is None:
+                raise RuntimeError(f"{service} collection failed, see the collector's error log")
+            self._emit(service, account_id, region, data)
+            if self.ledger is not None:
+                self.ledger.finish(account_id, region, service, 'done', records=len(data) if isinstance(data, list) else None)
+            return data
+        except Exception as e:
+            logger.exception("Service %s failed for account %s in region %s: %s", service, account_id, region, e)
+            if self.ledger is not None:
+                self.ledger.finish(account_id, region, service, 'failed', error=e)
+            return None
+
+    def _emit(self, service, account_id, region, records):
+        """Hands collected records to every sink; a failing sink never fails the service."""
+        if not records or not isinstance(records, list):
+            return
+        for sink in self.sinks:
+            try:
+                sink(service, account_id, region, records)
+            except Exception as e:
+                logger.exception("Record sink %r failed for %s in account %s region %s: %s", sink, service, account_id, region, e)
+
+
+def resolve_service_class(name, val):
+    """Resolves a config.SERVICE_MAP entry to its class, or None (logged) if it cannot be.
+
+    Entries are module-qualified strings like 'core.s3_service:S3Service', plain class
+    names looked up in this module's globals, or classes.
+    """
+    if val is None or not isinstance(val, str):
+        return val
+    if ':' in val:
+        module_path, cls_name = val.split(':', 1)
+        try:
+            module = importlib.import_module(module_path)
+        except (ImportError, AttributeError) as e:
+            logger.exception("Failed importing %s for service %s: %s", val, name, e)
+            return None
+        resolved = getattr(module, cls_name, None)
+        if resolved is None:
+            logger.warning("Class %s not found in module %s for service %s", cls_name, module_path, name)
+        return resolved
+    # fallback: try resolving simple class name from globals
+    resolved = globals().get(val)
+    if resolved is None:
+        logger.warning("Service class '%s' for key '%s' not found in globals", val, name)
+    return resolved
@@ -0,0 +1,179 @@
+# /core/ebs_service.py
+"""Module to inventory EBS volumes and flag unattached ones."""
+
+from datetime import datetime, timezone
+from sqlalchemy import tuple_
+from utils.logger import logger
+from core.service_base import ServiceBase
+from core.volume_sweep import region_volumes
+from db.bulk import bulk_upsert
+from db.init_db import Session
+from db.models import EBSVolume, EBSVolumeAttachment
+import config
+
+# Volume records per page handed to write_records.
+PAGE_SIZE = 500
+
+class EBSService(ServiceBase):
+    """Service to inventory the EBS volumes of one account and region."""
+    def __init__(self, session, region, account_id, connector=None):
+        self.connector = connector
+        self.account_id = account_id
+        self.client = self.get_client(session, 'ec2', region_name=region)
+        self.region = region
+        self._detached_since = None
+
+    probe_client = 'ec2'
+
+    @staticmethod
+    def probe(client):
+        """Returns whether the region has at least one volume, using a single small describe call."""
+        response = client.describe_volumes(MaxResults=5)
+        return bool(response['Volumes'] or response.get('NextToken'))
+
+    def iter_pages(self):
+        """Yields the volume records of the region's describe_volumes sweep in pages of PAGE_SIZE.
+
+        With a connector the sweep is shared with the EC2 collector of the same account
+        and region, so the region is described once.
+
+        Each record carries its attachments under 'attachments'. Orphan flags are set
+        here from the page alone plus the detached_since values already stored.
+        Once every page has been yielded, stored volumes of the account and region
+        that the sweep did not return (deleted in AWS) are removed with their
+        attachments; a sweep that fails or a pass that stops early removes nothing.
+        """
+        if self._detached_since is None:
+            self._detached_since = load_detached_since(self.account_id, self.region)
+        now = datetime.now(timezone.utc)
+        seen = set()
+        volumes = region_volumes(self.client, self.account_id, self.region, self.connector)
+        for offset in range(0, len(volumes), PAGE_SIZE):
+            records = [self._build_record(volume, now) for volume in volumes[offset:offset + PAGE_SIZE]]
+            seen.update(record['volume_id'] for record in records)
+            yield records
+        # Seen volumes may still be queued for the writers; only unseen ones are deleted.
+        delete_volumes(set(self._detached_since) - seen)
+
+    def write_records(self, records):
+        """Writes one page of volume records and their attachments.
+
+        Returns:
+            dict: Counts of 'inserted', 'updated' and 'unchanged' volume rows.
+        """
+        counts = bulk_upsert(EBSVolume, records, key='volume_id')
+        sync_volume_attachments(records)
+        return counts
+
+    def _build_record(self, volume, now):
+        volume_id = volume['VolumeId']
+        attachments = [
+            {
+                'volume_id': volume_id,
+                'instance_id': attachment['InstanceId'],
+                'device': attachment.get('Device'),
+                'state': attachment.get('State'),
+                'attach_time': attachment.get('AttachTime'),
+                'delete_on_termination': attachment.get('DeleteOnTermination'),
+            }
+            for attachment in volume.get('Attachments', [])
+            if attachment.get('InstanceId')
+        ]
+        is_orphaned = volume.get('State') == 'available' and not attachments
+        detached_since = None
+        if is_orphaned:
+            # The API has no detach time: keep the first run that saw the volume unattached,
+            # falling back to the creation time for volumes seen unattached from the start.
+            detached_since = self._detached_since.get(volume_id) or (
+                volume.get('CreateTime') if volume_id not in self._detached_since else now
+            )
+        detached_days = (now - detached_since).days if detached_since else None
+        return {
+            'volume_id': volume_id,
+            'account_id': self.account_id,
+            'region': self.region,
+            'availability_zone': volume.get('AvailabilityZone'),
+            'volume_type': volume.get('VolumeType'),
+            'size_gb': volume.get('Size'),
+            'iops': volume.get('Iops'),
+            'throughput': volume.get('Throughput'),
+            'encrypted': volume.get('Encrypted'),
+            'state': volume.get('State'),
+            'snapshot_id': volume.get('SnapshotId') or None,
+            'multi_attach_enabled': volume.get('MultiAttachEnabled'),
+            'create_time': volume.get('CreateTime'),
+            'tag_properties': {tag['Key']: tag['Value'] for tag in volume.get('Tags', [])},
+            'is_orphaned': is_orphaned,
+            'detached_since': detached_since,
+            'detached_days': detached_days,
+            'long_detached': detached_days is not None and detached_days >= config.EBS_LONG_DETACHED_DAYS,
+            'attachments': attachments,
+        }
+
+
+def load_detached_since(account_id, region):
+    """Returns volume_id -> stored detached_since (None for attached volumes) for the region.
+
+    Loaded once per collector so the detach time survives across runs without any
+    per-volume API call.
+    """
+    session = Session()
+    try:
+        rows = (
+            session.query(EBSVolume.volume_id, EBSVolume.detached_since)
+            .filter(EBSVolume.account_id == account_id, EBSVolume.region == region)
+            .all()
+        )
+        return dict(rows)
+    finally:
+        session.close()
+
+
+def delete_volumes(volume_ids):
+    """Deletes volumes that no longer exist in AWS, and their attachments.
+
+    Returns:
+        int: The number of volumes deleted.
+    """
+    if not volume_ids:
+        return 0
+    session = Session()
+    try:
+        session.query(EBSVolumeAttachment).filter(
+            EBSVolumeAttachment.volume_id.in_(volume_ids)
+        ).delete(synchronize_session=False)
+        deleted = session.query(EBSVolume).filter(EBSVolume.volume_id.in_(volume_ids)).delete(synchronize_session=False)
+        session.commit()
+    except Exception as e:
+        session.rollback()
+        logger.error("Error removing deleted EBS volumes: %s", e)
+        raise
+    finally:
+        session.close()
+    logger.info("Removed %s EBS volumes deleted in AWS", deleted)
+    return deleted
+
+
+def sync_volume_attachments(volume_records):
+    """Upserts the attachments of a page of volumes and deletes the ones that went away."""
+    attachments = [attachment for record in volume_records for attachment in record['attachments']]
+    counts = bulk_upsert(EBSVolumeAttachment, attachments, key=('volume_id', 'instance_id'))
+    current = {(attachment['volume_id'], attachment['instance_id']) for attachment in attachments}
+    session = Session()
+    try:
+        query = session.query(EBSVolumeAttachment).filter(
+            EBSVolumeAttachment.volume_id.in_([record['volume_id'] for record in volume_records])
+        )
+        if current:
+            query = query.filter(tuple_(EBSVolumeAttachment.volume_id, EBSVolumeAttachment.instance_id).notin_(current))
+        counts['deleted'] = query.delete(synchronize_session=False)
+        session.commit()
+    except Exception as e:
+        session.rollback()
+        logger.error("Error removing stale EBS attachments: %s", e)
+        raise
+    finally:
+        session.close()
+    return counts
+
+# end of file
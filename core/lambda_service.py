@@ -0,0 +1,132 @@
+# /core/lambda_service.py
+"""Module to interact with AWS Lambda functions."""
+
+from datetime import datetime, timedelta, timezone
+from core.service_base import ServiceBase
+from core.cloudwatch_metrics import get_metric_data_batched
+from db.bulk import bulk_upsert
+from db.models import LambdaFunction
+import config
+
+# (record column, CloudWatch metric, statistic) pulled for every function.
+LAMBDA_METRICS = [
+    ('invocations', 'Invocations', 'Sum'),
+    ('errors', 'Errors', 'Sum'),
+    ('throttles', 'Throttles', 'Sum'),
+    ('avg_duration_ms', 'Duration', 'Average'),
+    ('max_duration_ms', 'Duration', 'Maximum'),
+]
+
+class LambdaService(ServiceBase):
+    """Service to interact with AWS Lambda functions."""
+    def __init__(self, session, region, account_id, connector=None):
+        self.connector = connector
+        self.account_id = account_id
+        self.client = self.get_client(session, 'lambda', region_name=region)
+        self.cw_client = self.get_client(session, 'cloudwatch', region_name=region)
+        self.region = region
+
+    probe_client = 'lambda'
+
+    @staticmethod
+    def probe(client):
+        """Returns whether the region has at least one function, using a single list call."""
+        return bool(client.list_functions(MaxItems=1)['Functions'])
+
+    def iter_pages(self):
+        """Yields function records in groups sized to fill one GetMetricData call.
+
+        list_functions returns at most 50 functions per page, so pages are regrouped
+        until every metric query of the group fits in config.METRIC_BATCH_SIZE.
+        """
+        group_size = max(1, config.METRIC_BATCH_SIZE // len(LAMBDA_METRICS))
+        pending = []
+        paginator = self.client.get_paginator('list_functions')
+        for page in paginator.paginate():
+            pending.extend(page.get('Functions', []))
+            while len(pending) >= group_size:
+                yield self._build_records(pending[:group_size])
+                pending = pending[group_size:]
+        if pending:
+            yield self._build_records(pending)
+
+    def write_records(self, records):
+        """Bulk-writes one page of function records to lambda_functions."""
+        return bulk_sync_lambda_functions_to_db(records)
+
+    def _build_records(self, functions):
+        """Builds the lambda_functions records for a group of functions with one metrics sweep."""
+        days = config.LAMBDA_METRIC_DAYS
+        end_time = datetime.now(timezone.utc).replace(second=0, microsecond=0)
+        start_time = end_time - timedelta(days=days)
+        queries = [
+            {
+                'key': (function['FunctionName'], column),
+                'namespace': 'AWS/Lambda',
+                'metric_name': metric_name,
+                'dimensions': [{'Name': 'FunctionName', 'Value': function['FunctionName']}],
+                'stat': stat,
+                # One period spanning the whole window, so each query returns a single datapoint.
+                'period': days * 86400,
+            }
+            for function in functions
+            for column, metric_name, stat in LAMBDA_METRICS
+        ]
+        values = get_metric_data_batched(self.cw_client, queries, start_time, end_time)
+        records = []
+        for function in functions:
+            record = {
+                'function_arn': function['FunctionArn'],
+                'function_name': function['FunctionName'],
+                'account_id': self.account_id,
+                'region': self.region,
+                'runtime': function.get('Runtime'),
+                'package_type': function.get('PackageType'),
+                'architectures': ', '.join(function.get('Architectures', [])) or None,
+                'memory_size': function.get('MemorySize'),
+                'timeout': function.get('Timeout'),
+                'code_size': function.get('CodeSize'),
+                'ephemeral_storage': function.get('EphemeralStorage', {}).get('Size'),
+                'handler': function.get('Handler'),
+                'role': function.get('Role'),
+                'last_modified': _parse_last_modified(function.get('LastModified')),
+                'metric_window_days': days,
+            }
+            for column, _, stat in LAMBDA_METRICS:
+                record[column] = _aggregate(values.get((function['FunctionName'], column)), stat)
+            records.append(record)
+        return records
+
+
+def _aggregate(datapoints, stat):
+    """Reduces the datapoints of one query; None when the call failed or nothing was recorded."""
+    if not datapoints:
+        # A successful call without datapoints means no invocations in the window.
+        return 0 if datapoints is not None and stat == 'Sum' else None
+    values = [value for _, value in datapoints]
+    if stat == 'Sum':
+        return sum(values)
+    if stat == 'Maximum':
+        return max(values)
+    return sum(values) / len(values)
+
+
+def _parse_last_modified(value):
+    """Parses Lambda's '2024-05-01T12:34:56.789+0000' timestamps."""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+def bulk_sync_lambda_functions_to_db(functions_props, chunk_size=None):
+    """Upserts Lambda function records with multi-row INSERT ... ON CONFLICT (function_arn) DO UPDATE.
+
+    Returns:
+    dict: Counts of 'inserted', 'updated' and 'unchanged' rows.
+    """
+    return bulk_upsert(LambdaFunction, functions_props, key='function_arn', chunk_size=chunk_size)
+
+# end of file
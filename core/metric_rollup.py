@@ -0,0 +1,205 @@
+# /core/metric_rollup.py
+"""Incremental daily CloudWatch rollups stored in instance_metric_daily."""
+
+from collections import defaultdict
+from datetime import datetime, time, timedelta, timezone
+from sqlalchemy import case, func
+from core.cloudwatch_metrics import get_metric_data_batched
+from db.bulk import bulk_upsert
+from db.init_db import Session
+from db.models import InstanceMetricDaily
+from utils.logger import logger
+import config
+
+ROLLUP_STATISTICS = ['Average', 'Maximum', 'Minimum', 'SampleCount']
+
+
+def collect_rolled_up_aggregates(cw_client, instance_ids, metric_name, days_list, region, namespace='AWS/EC2'):
+    """
+    Collect aggregated metric data for many instances from the daily rollup store.
+
+    Only the complete UTC days not stored yet, plus the recent days that may still
+    receive late datapoints, are fetched from CloudWatch (one GetMetricData sweep per
+    distinct start day); every window in days_list is then computed from the stored days.
+
+    Args:
+    instance_ids (list): The IDs of the EC2 instances.
+    metric_name (str): The metric to collect (e.g., 'CPUUtilization').
+    days_list (list): A list of durations in days (e.g., [30, 60, 90]).
+    region (str): AWS region.
+
+    Returns:
+    dict: Same structure as collect_metric_aggregates_batch:
+        {instance_id: {days: {'Average': .., 'Maximum': .., 'Minimum': ..}}}.
+    """
+    if not instance_ids:
+        return {}
+    today = datetime.now(timezone.utc).date()
+    store_missing_days(cw_client, instance_ids, metric_name, today - timedelta(days=max(days_list)), today, namespace)
+    aggregates = compute_window_aggregates(instance_ids, metric_name, days_list, today)
+    logger.info("Computed %s rollup windows for %s instances in region %s", metric_name, len(instance_ids), region)
+    return aggregates
+
+
+def load_rollup_coverage(instance_ids, metric_name, empty_since):
+    """Returns instance_id -> (earliest day, latest day, earliest empty day since empty_since) stored for the metric.
+
+    An empty day is one stored with sample_count 0; the third value is None when there is none.
+    """
+    session = Session()
+    try:
+        recent_empty_day = case(
+            (
+                (InstanceMetricDaily.sample_count == 0) & (InstanceMetricDaily.day >= empty_since),
+                InstanceMetricDaily.day,
+            ),
+        )
+        rows = (
+            session.query(
+                InstanceMetricDaily.instance_id,
+                func.min(InstanceMetricDaily.day),
+                func.max(InstanceMetricDaily.day),
+                func.min(recent_empty_day),
+            )
+            .filter(InstanceMetricDaily.metric_name == metric_name, InstanceMetricDaily.instance_id.in_(instance_ids))
+            .group_by(InstanceMetricDaily.instance_id)
+            .all()
+        )
+        return {instance_id: (earliest, latest, empty) for instance_id, earliest, latest, empty in rows}
+    finally:
+        session.close()
+
+
+def first_day_to_fetch(coverage, window_start, today):
+    """Returns the first day to fetch for an instance given its load_rollup_coverage entry (or None)."""
+    if coverage is None:
+        return window_start
+    earliest, latest, first_empty = coverage
+    if earliest > window_start:
+        # Stored days start inside the window (a longer window, pruned or lost rows): backfill.
+        return window_start
+    candidates = [latest + timedelta(days=1), today - timedelta(days=config.METRIC_ROLLUP_REFETCH_DAYS)]
+    if first_empty is not None:
+        candidates.append(first_empty)
+    return max(window_start, min(candidates))
+
+
+def store_missing_days(cw_client, instance_ids, metric_name, window_start, today, namespace='AWS/EC2'):
+    """Fetches daily Average/Maximum/Minimum/SampleCount for the days not yet stored.
+
+    Missing days at either end of the window are fetched, and so are the last
+    config.METRIC_ROLLUP_REFETCH_DAYS days and any day of the last
+    config.METRIC_ROLLUP_EMPTY_RECHECK_DAYS stored without datapoints, since
+    CloudWatch can still add late datapoints to them. Days inside the fetched range
+    without datapoints are stored with sample_count 0 so older ones are not requested
+    again. Days before window_start are never fetched.
+    """
+    coverage = load_rollup_coverage(
+        instance_ids, metric_name, today - timedelta(days=config.METRIC_ROLLUP_EMPTY_RECHECK_DAYS)
+    )
+    # GetMetricData shares one StartTime per call, so group instances by their first day to fetch.
+    groups = defaultdict(list)
+    for instance_id in instance_ids:
+        first_missing = first_day_to_fetch(coverage.get(instance_id), window_start, today)
+        if first_missing < today:
+            groups[first_missing].append(instance_id)
+
+    rows = []
+    for start_day, group_ids in groups.items():
+        start_time = datetime.combine(start_day, time.min, tzinfo=timezone.utc)
+        end_time = datetime.combine(today, time.min, tzinfo=timezone.utc)
+        queries = [
+            {
+                'key': (instance_id, stat),
+                'namespace': namespace,
+                'metric_name': metric_name,
+                'dimensions': [{'Name': 'InstanceId', 'Value': instance_id}],
+                'stat': stat,
+                'period': 86400,
+            }
+            for instance_id in group_ids
+            for stat in ROLLUP_STATISTICS
+        ]
+        values = get_metric_data_batched(cw_client, queries, start_time, end_time)
+        days = [start_day + timedelta(days=offset) for offset in range((today - start_day).days)]
+        for instance_id in group_ids:
+            if any(values.get((instance_id, stat)) is None for stat in ROLLUP_STATISTICS):
+                # The batch failed; leave these days missing so the next run retries them.
+                continue
+            by_day = defaultdict(dict)
+            for stat in ROLLUP_STATISTICS:
+                for timestamp, value in values[(instance_id, stat)]:
+                    by_day[timestamp.astimezone(timezone.utc).date()][stat] = value
+            for day in days:
+                day_values = by_day.get(day, {})
+                rows.append({
+                    'instance_id': instance_id,
+                    'metric_name': metric_name,
+                    'day': day,
+                    'average': day_values.get('Average'),
+                    'maximum': day_values.get('Maximum'),
+                    'minimum': day_values.get('Minimum'),
+                    'sample_count': day_values.get('SampleCount', 0),
+                })
+    bulk_upsert(InstanceMetricDaily, rows, key=('instance_id', 'metric_name', 'day'))
+    return len(rows)
+
+
+def compute_window_aggregates(instance_ids, metric_name, days_list, today):
+    """Aggregates the stored days into one Average/Maximum/Minimum per window.
+
+    The average is weighted by each day's sample count so it matches a single
+    CloudWatch statistic over the whole window.
+    """
+    aggregates = {
+        instance_id: {days: {'Average': 'N/A', 'Maximum': 'N/A', 'Minimum': 'N/A'} for days in days_list}
+        for instance_id in instance_ids
+    }
+    weighted_average = (
+        func.sum(InstanceMetricDaily.average * InstanceMetricDaily.sample_count)
+        / func.nullif(func.sum(InstanceMetricDaily.sample_count), 0)
+    )
+    session = Session()
+    try:
+        for days in days_list:
+            rows = (
+                session.query(
+                    InstanceMetricDaily.instance_id,
+                    weighted_average,
+                    func.max(InstanceMetricDaily.maximum),
+                    func.min(InstanceMetricDaily.minimum),
+                )
+                .filter(
+                    InstanceMetricDaily.metric_name == metric_name,
+                    InstanceMetricDaily.instance_id.in_(instance_ids),
+                    InstanceMetricDaily.day >= today - timedelta(days=days),
+                    InstanceMetricDaily.day < today,
+                    InstanceMetricDaily.sample_count > 0,
+                )
+                .group_by(InstanceMetricDaily.instance_id)
+                .all()
+            )
+            for instance_id, average, maximum, minimum in rows:
+                aggregates[instance_id][days] = {
+                    'Average': average if average is not None else 'N/A',
+                    'Maximum': maximum if maximum is not None else 'N/A',
+                    'Minimum': minimum if minimum is not None else 'N/A',
+                }
+    finally:
+        session.close()
+    return aggregates
+
+
+def prune_metric_rollups(retention_days):
+    """Deletes rollup days older than retention_days."""
+    cutoff = datetime.now(timezone.utc).date() - timedelta(days=retention_days)
+    session = Session()
+    try:
+        deleted = session.query(InstanceMetricDaily).filter(InstanceMetricDaily.day < cutoff).delete(synchronize_session=False)
+        session.commit()
+        logger.info("Pruned %s metric rollup rows older than %s", deleted, cutoff)
+        return deleted
+    finally:
+        session.close()
+
+# end of file
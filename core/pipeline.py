@@ -0,0 +1,73 @@
+# /core/pipeline.py
+"""Bounded producer/consumer pipeline between the collectors and the DB writers."""
+
+import queue
+import threading
+from utils.logger import logger
+import config
+
+_STOP = object()
+
+
+class RecordPipeline:
+    """Feeds pages of records through a bounded queue to background writer threads.
+
+    submit() blocks while the queue is full, so collectors can never run more than
+    max_pending pages ahead of the database. Only per-key summaries are kept.
+    """
+
+    def __init__(self, max_pending=None, writers=None):
+        self._queue = queue.Queue(maxsize=max_pending or config.STREAM_QUEUE_SIZE)
+        self._lock = threading.Lock()
+        self.summaries = {}
+        self._threads = [
+            threading.Thread(target=self._worker, name=f"finops-writer-{idx}", daemon=True)
+            for idx in range(writers or config.STREAM_WRITERS)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, key, write_fn, records):
+        """Queues one page for write_fn(records); key identifies the summary it counts towards."""
+        with self._lock:
+            summary = self.summaries.setdefault(key, _empty_summary())
+            summary['records'] += len(records)
+            summary['pages'] += 1
+        self._queue.put((key, write_fn, records))
+
+    def _worker(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is _STOP:
+                    return
+                key, write_fn, records = item
+                try:
+                    counts = write_fn(records) or {}
+                except Exception as e:
+                    logger.exception("Writer failed for %s (%s records): %s", key, len(records), e)
+                    counts = {'write_errors': 1}
+                with self._lock:
+                    summary = self.summaries[key]
+                    for name, value in counts.items():
+                        summary[name] = summary.get(name, 0) + value
+            finally:
+                self._queue.task_done()
+
+    def close(self):
+        """Waits for every queued page to be written and stops the writers.
+
+        Returns:
+            dict: {key: summary} with records, pages and the writers' counts.
+        """
+        for _ in self._threads:
+            self._queue.put(_STOP)
+        for thread in self._threads:
+            thread.join()
+        return self.summaries
+
+
+def _empty_summary():
+    return {'records': 0, 'pages': 0, 'inserted': 0, 'updated': 0, 'unchanged': 0, 'write_errors': 0}
+
+# end of file
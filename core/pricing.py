@@ -0,0 +1,277 @@
+# /core/pricing.py
+"""Offline EC2/EBS price catalog and vectorized monthly cost estimates."""
+
+from datetime import datetime, timezone
+import hashlib
+import json
+import os
+import numpy as np
+import pandas as pd
+from db.bulk import bulk_upsert
+from db.init_db import Session
+from db.models import EBSVolume, EBSVolumeAttachment, EC2CostEstimate, EC2Instance
+from utils.logger import logger
+from utils.telemetry import telemetry
+import config
+
+COMPUTE_KEY = ['region', 'instance_type', 'operation']
+STORAGE_KEY = ['region', 'volume_type']
+# Only the default shared-tenancy, on-demand, no-preinstalled-software Linux/Windows/... rates.
+COMPUTE_FILTERS = {'tenancy': 'Shared', 'capacity_status': 'Used', 'pre_installed_sw': 'NA'}
+# Price-list CSV column -> catalog column.
+CSV_COLUMNS = {
+    'TermType': 'term_type',
+    'Unit': 'unit',
+    'PricePerUnit': 'price',
+    'Currency': 'currency',
+    'Product Family': 'product_family',
+    'Region Code': 'region',
+    'Instance Type': 'instance_type',
+    'Operation': 'operation',
+    'Tenancy': 'tenancy',
+    'CapacityStatus': 'capacity_status',
+    'Pre Installed S/W': 'pre_installed_sw',
+    'Volume API Name': 'volume_type',
+}
+# Offer-file product attribute -> catalog column.
+JSON_ATTRIBUTES = {
+    'regionCode': 'region',
+    'instanceType': 'instance_type',
+    'operation': 'operation',
+    'tenancy': 'tenancy',
+    'capacitystatus': 'capacity_status',
+    'preInstalledSw': 'pre_installed_sw',
+    'volumeApiName': 'volume_type',
+}
+
+
+class PriceCatalog:
+    """Hourly compute prices keyed by (region, instance_type, operation) and EBS GB-month
+    prices keyed by (region, volume_type), both as DataFrames with a sorted MultiIndex."""
+
+    def __init__(self, compute, storage):
+        self.compute = compute
+        self.storage = storage
+
+    def __len__(self):
+        return len(self.compute) + len(self.storage)
+
+
+def load_price_catalog(path=None, cache_dir=None):
+    """
+    Loads the price catalog from an AWS EC2 price list file (bulk offer JSON or CSV).
+
+    The parsed catalog is cached as a pickle named after the file's path, size and
+    mtime, so it is only re-parsed when the price list changes.
+
+    Returns:
+    PriceCatalog, or None when no price list is configured.
+    """
+    path = path or config.PRICE_LIST_FILE
+    if not path:
+        return None
+    cache_dir = cache_dir or config.PRICE_CACHE_DIR
+    stat = os.stat(path)
+    cache_key = hashlib.sha256(f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}".encode()).hexdigest()[:16]
+    cache_path = os.path.join(cache_dir, f"price_catalog_{cache_key}.pkl")
+    if os.path.exists(cache_path):
+        try:
+            catalog = pd.read_pickle(cache_path)
+            logger.info("Loaded %s prices from catalog cache %s", len(catalog), cache_path)
+            return catalog
+        except Exception as e:
+            logger.warning("Ignoring unreadable price catalog cache %s: %s", cache_path, e)
+
+    with telemetry.timed("pricing.parse"):
+        rows = _read_csv_price_list(path) if path.lower().endswith('.csv') else _read_json_price_list(path)
+        catalog = _build_catalog(rows)
+    os.makedirs(cache_dir, exist_ok=True)
+    pd.to_pickle(catalog, cache_path)
+    logger.info("Parsed %s prices from %s and cached them in %s", len(catalog), path, cache_path)
+    return catalog
+
+
+def _read_csv_price_list(path):
+    """Reads a price-list CSV; the header follows a few lines of offer metadata."""
+    with open(path, encoding='utf-8') as price_file:
+        header_line = next(idx for idx, line in enumerate(price_file) if line.startswith('"SKU"'))
+    frame = pd.read_csv(
+        path,
+        skiprows=header_line,
+        usecols=lambda column: column in CSV_COLUMNS,
+        dtype=str,
+        keep_default_na=False,
+    )
+    return frame.rename(columns=CSV_COLUMNS)
+
+
+def _read_json_price_list(path):
+    """Flattens the bulk offer JSON into one row per on-demand price dimension."""
+    with open(path, encoding='utf-8') as price_file:
+        offer = json.load(price_file)
+    products = offer.get('products', {})
+    rows = []
+    for sku, terms in offer.get('terms', {}).get('OnDemand', {}).items():
+        product = products.get(sku)
+        if product is None:
+            continue
+        attributes = product.get('attributes', {})
+        base = {column: attributes.get(attribute, '') for attribute, column in JSON_ATTRIBUTES.items()}
+        base['product_family'] = product.get('productFamily', '')
+        for term in terms.values():
+            for dimension in term.get('priceDimensions', {}).values():
+                rows.append({
+                    **base,
+                    'term_type': 'OnDemand',
+                    'unit': dimension.get('unit', ''),
+                    'price': dimension.get('pricePerUnit', {}).get('USD', ''),
+                    'currency': 'USD',
+                })
+    return pd.DataFrame(rows, columns=['term_type', 'unit', 'price', 'currency', 'product_family', *JSON_ATTRIBUTES.values()])
+
+
+def _build_catalog(rows):
+    rows = rows[(rows['term_type'] == 'OnDemand') & (rows['currency'] == 'USD')].copy()
+    rows['price'] = pd.to_numeric(rows['price'], errors='coerce')
+
+    compute_mask = (rows['product_family'] == 'Compute Instance') & (rows['unit'] == 'Hrs')
+    for column, value in COMPUTE_FILTERS.items():
+        compute_mask &= rows[column] == value
+    compute = (
+        rows.loc[compute_mask & rows['price'].notna(), COMPUTE_KEY + ['price']]
+        .rename(columns={'price': 'hourly_price'})
+        # Several SKUs can share a key (e.g. license variants); keep the cheapest.
+        .groupby(COMPUTE_KEY).min().sort_index()
+    )
+    storage_mask = (rows['product_family'] == 'Storage') & (rows['unit'] == 'GB-Mo') & (rows['volume_type'] != '')
+    storage = (
+        rows.loc[storage_mask & rows['price'].notna(), STORAGE_KEY + ['price']]
+        .rename(columns={'price': 'gb_month_price'})
+        .groupby(STORAGE_KEY).min().sort_index()
+    )
+    return PriceCatalog(compute, storage)
+
+
+def load_cost_inventory():
+    """Loads the EC2 columns that drive the cost estimate into a DataFrame."""
+    columns = [
+        'instance_id', 'account_id', 'region', 'instance_type', 'state', 'usage_operation',
+        'volume_id', 'volume_type', 'volume_size',
+    ]
+    session = Session()
+    try:
+        query = session.query(*(getattr(EC2Instance, column) for column in columns))
+        inventory = pd.read_sql(query.statement, session.connection())
+    finally:
+        session.close()
+    inventory['volume_size'] = pd.to_numeric(inventory['volume_size'], errors='coerce').astype('Int64')
+    return inventory
+
+
+def load_cost_volumes():
+    """Loads the attached EBS volumes (instance_id, volume_id, region, volume_type, size_gb) into a DataFrame.
+
+    A multi-attached volume is charged once, to the first instance by instance_id.
+    """
+    columns = [
+        EBSVolumeAttachment.instance_id, EBSVolume.volume_id, EBSVolume.region,
+        EBSVolume.volume_type, EBSVolume.size_gb,
+    ]
+    session = Session()
+    try:
+        query = (
+            session.query(*columns)
+            .join(EBSVolume, EBSVolume.volume_id == EBSVolumeAttachment.volume_id)
+            .order_by(EBSVolumeAttachment.instance_id)
+        )
+        volumes = pd.read_sql(query.statement, session.connection())
+    finally:
+        session.close()
+    return volumes.drop_duplicates('volume_id')
+
+
+def estimate_costs(inventory, catalog, hours_per_month=None, volumes=None):
+    """
+    Prices the whole inventory with vectorized joins against the catalog.
+
+    Compute is charged for running instances only; EBS storage for every instance,
+    each volume at its own type's price (volumes as returned by load_cost_volumes).
+    Instances without volume rows fall back to the collected volume_size and
+    volume_type, but only when they have a single volume, since volume_type is the
+    first volume's. Instances whose type or any volume has no catalog price get NULL
+    for that part, and then a NULL total_monthly.
+
+    Returns:
+    DataFrame: One row per instance with hourly_price, compute_monthly,
+        storage_monthly and total_monthly in USD.
+    """
+    hours_per_month = hours_per_month or config.HOURS_PER_MONTH
+    frame = inventory.copy()
+    # usage_operation holds the price-list operation code, e.g. RunInstances:0002 for Windows.
+    frame['operation'] = frame['usage_operation'].where(
+        frame['usage_operation'].notna() & (frame['usage_operation'] != 'N/A'), 'RunInstances'
+    )
+    frame = frame.merge(catalog.compute, how='left', left_on=COMPUTE_KEY, right_index=True)
+    running = frame['state'].eq('running')
+    frame['compute_monthly'] = (frame['hourly_price'] * hours_per_month).where(running, 0.0).round(2)
+
+    frame = frame.merge(catalog.storage, how='left', left_on=STORAGE_KEY, right_index=True)
+    single_volume = frame['volume_id'].notna() & ~frame['volume_id'].astype(str).str.contains(',')
+    fallback = (frame['volume_size'].astype('float64') * frame['gb_month_price']).where(single_volume)
+    if volumes is not None and len(volumes):
+        priced = volumes.merge(catalog.storage, how='left', left_on=STORAGE_KEY, right_index=True)
+        priced['monthly'] = pd.to_numeric(priced['size_gb'], errors='coerce') * priced['gb_month_price']
+        per_instance = priced.groupby('instance_id')['monthly'].agg(['sum', 'count', 'size'])
+        # One unpriced volume leaves the instance's storage unpriced.
+        storage = per_instance['sum'].where(per_instance['count'] == per_instance['size'])
+        has_volumes = frame['instance_id'].isin(per_instance.index)
+        frame['storage_monthly'] = np.where(has_volumes, frame['instance_id'].map(storage), fallback)
+    else:
+        frame['storage_monthly'] = fallback
+    frame['storage_monthly'] = frame['storage_monthly'].astype('float64').round(2)
+    frame['total_monthly'] = (frame['compute_monthly'] + frame['storage_monthly']).round(2)
+    return frame.drop(columns=['operation', 'gb_month_price', 'state', 'volume_id'])
+
+
+def write_cost_estimates(estimates, estimated_at):
+    """Upserts the estimates and deletes those of instances no longer in the inventory."""
+    frame = estimates.assign(estimated_at=estimated_at)
+    records = frame.astype(object).where(frame.notna(), None).to_dict('records')
+    counts = bulk_upsert(EC2CostEstimate, records, key='instance_id')
+    session = Session()
+    try:
+        counts['deleted'] = (
+            session.query(EC2CostEstimate)
+            .filter(EC2CostEstimate.estimated_at < estimated_at)
+            .delete(synchronize_session=False)
+        )
+        session.commit()
+    finally:
+        session.close()
+    return counts
+
+
+def run_cost_estimates(path=None):
+    """Prices the current inventory and writes ec2_cost_estimates.
+
+    Returns:
+    dict: Instances priced, unpriced and the total monthly estimate, or None when
+    no price list is configured.
+    """
+    catalog = load_price_catalog(path)
+    if catalog is None:
+        logger.info("No price list configured; skipping cost estimates")
+        return None
+    estimated_at = datetime.now(timezone.utc)
+    with telemetry.timed("analysis.cost_estimates"):
+        estimates = estimate_costs(load_cost_inventory(), catalog, volumes=load_cost_volumes())
+        write_cost_estimates(estimates, estimated_at)
+    summary = {
+        'instances': len(estimates),
+        'unpriced': int(estimates['total_monthly'].isna().sum()),
+        'total_monthly': round(float(estimates['total_monthly'].sum()), 2),
+    }
+    logger.info("Cost estimates: %s", summary)
+    return summary
+
+# end of file
@@ -0,0 +1,157 @@
+# /core/rate_limiter.py
+"""Client-side adaptive rate limiting shared by all AWS service collectors."""
+
+import re
+import threading
+import time
+from utils.logger import logger
+import config
+
+THROTTLE_ERROR_CODES = {
+    'Throttling',
+    'ThrottlingException',
+    'ThrottledException',
+    'RequestThrottled',
+    'RequestThrottledException',
+    'RequestLimitExceeded',
+    'TooManyRequestsException',
+    'ProvisionedThroughputExceededException',
+    'BandwidthLimitExceeded',
+    'SlowDown',
+}
+
+
+class TokenBucket:
+    """Token bucket whose refill rate backs off on throttling and recovers on success."""
+
+    def __init__(self, max_rate):
+        self.max_rate = float(max_rate)
+        self.rate = float(max_rate)
+        self.capacity = max(1.0, float(max_rate))
+        self._tokens = self.capacity
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.throttles = 0
+        self.retries = 0
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    def acquire(self):
+        """Blocks until a token is available."""
+        while True:
+            with self._lock:
+                self._refill(time.monotonic())
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    self.calls += 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def record_retry(self):
+        """Counts an HTTP attempt that was a retry of an earlier one."""
+        with self._lock:
+            self.retries += 1
+
+    def on_throttle(self):
+        """Multiplicative decrease: cut the rate and drain the bucket."""
+        with self._lock:
+            self.throttles += 1
+            self.rate = max(config.RATE_LIMIT_MIN, self.rate * config.RATE_LIMIT_BACKOFF)
+            self._tokens = 0.0
+            self._last_refill = time.monotonic()
+
+    def on_success(self):
+        """Additive increase back towards the configured maximum."""
+        if self.rate < self.max_rate:
+            with self._lock:
+                self.rate = min(self.max_rate, self.rate + self.max_rate * config.RATE_LIMIT_RECOVERY)
+
+
+class RateLimiterRegistry:
+    """Holds one TokenBucket per (account, region, API family) and wires them into botocore clients.
+
+    The API family is the service plus the operation verb, e.g. ('ec2', 'Describe') or
+    ('cloudwatch', 'Get'), matching how AWS buckets its request limits.
+    """
+
+    def __init__(self, limits=None):
+        self.limits = limits or config.RATE_LIMITS
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, account_id, region, service, operation):
+        """Returns the shared bucket for the operation, creating it on first use."""
+        verb = re.match(r'[A-Z][a-z]*', operation)
+        key = (account_id, region, service, verb.group(0) if verb else operation)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            with self._lock:
+                bucket = self._buckets.get(key)
+                if bucket is None:
+                    bucket = TokenBucket(self.limits.get(service, self.limits['default']))
+                    self._buckets[key] = bucket
+        return bucket
+
+    def register(self, client, account_id, region):
+        """Hooks the limiter into the client's request lifecycle.
+
+        A token is taken before every HTTP attempt (retries included) and every response
+        feeds the adaptive rate: throttling errors back off, successes recover.
+        """
+        def _bucket_for(event_name):
+            # Event names look like 'before-send.ec2.DescribeInstances'.
+            _, service, operation = event_name.split('.', 2)
+            return self.bucket(account_id, region, service, operation)
+
+        def before_send(event_name=None, **kwargs):
+            _bucket_for(event_name).acquire()
+
+        def needs_retry(event_name=None, response=None, attempts=1, **kwargs):
+            bucket = _bucket_for(event_name)
+            if attempts > 1:
+                bucket.record_retry()
+            error_code = None
+            if response is not None:
+                error_code = response[1].get('Error', {}).get('Code')
+            if error_code in THROTTLE_ERROR_CODES:
+                bucket.on_throttle()
+                logger.warning("Throttled on %s (%s) in account %s region %s, backing off to %.2f req/s",
+                               event_name.split('.', 1)[1], error_code, account_id, region, bucket.rate)
+            elif error_code is None and kwargs.get('caught_exception') is None:
+                bucket.on_success()
+            # Returning None leaves the retry decision to botocore.
+            return None
+
+        # The wildcard makes these handlers more specific than botocore's own retry
+        # handler on 'needs-retry.<service>', so they run before it can short-circuit.
+        service_id = client.meta.service_model.service_id.hyphenize()
+        client.meta.events.register_first(f'before-send.{service_id}.*', before_send)
+        client.meta.events.register_first(f'needs-retry.{service_id}.*', needs_retry)
+
+    def stats(self):
+        """Returns per-bucket counters keyed by 'account/region/service:Verb'."""
+        with self._lock:
+            buckets = dict(self._buckets)
+        return {
+            f"{account_id}/{region}/{service}:{verb}": {
+                'calls': bucket.calls,
+                'throttles': bucket.throttles,
+                'retries': bucket.retries,
+                'rate': round(bucket.rate, 2),
+            }
+            for (account_id, region, service, verb), bucket in buckets.items()
+        }
+
+    def totals(self):
+        """Returns calls, throttles and retries summed over all buckets."""
+        totals = {'calls': 0, 'throttles': 0, 'retries': 0}
+        for bucket_stats in self.stats().values():
+            for key in totals:
+                totals[key] += bucket_stats[key]
+        return totals
+
+# end of file
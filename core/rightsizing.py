@@ -0,0 +1,164 @@
+# /core/rightsizing.py
+"""Vectorized idle, underutilized and oversized detection over the EC2 inventory."""
+
+from datetime import datetime, timezone
+import re
+import numpy as np
+import pandas as pd
+from db.bulk import bulk_upsert
+from db.init_db import Session
+from db.models import EC2Instance, RightsizingRecommendation
+from utils.logger import logger
+from utils.telemetry import telemetry
+import config
+
+# Sizes in ascending order; each step down roughly halves vCPUs and memory.
+SIZE_LADDER = [
+    'nano', 'micro', 'small', 'medium', 'large', 'xlarge', '2xlarge', '4xlarge',
+    '8xlarge', '12xlarge', '16xlarge', '24xlarge', '32xlarge', '48xlarge',
+]
+# Smallest size offered by a family; burstable families go down to nano, Graviton to medium.
+DEFAULT_MIN_SIZE = 'large'
+BURSTABLE_MIN_SIZE = 'nano'
+GRAVITON_MIN_SIZE = 'medium'
+# Sizes removed by each recommendation.
+DOWNSIZE_STEPS = {'underutilized': 2, 'oversized': 1}
+INVENTORY_COLUMNS = [
+    'instance_id', 'account_id', 'region', 'instance_type', 'state',
+    'thirty_days_avg', 'thirty_days_max', 'sixty_days_max',
+]
+# Burstable families: t2, t3, t3a, t4g; not trn1/trn2 (Trainium).
+BURSTABLE_FAMILY = re.compile(r'^t\d')
+
+
+def load_inventory():
+    """Loads the EC2 inventory and its CPU aggregates into a DataFrame."""
+    session = Session()
+    try:
+        query = session.query(*(getattr(EC2Instance, column) for column in INVENTORY_COLUMNS))
+        inventory = pd.read_sql(query.statement, session.connection())
+    finally:
+        session.close()
+    for column in ('thirty_days_avg', 'thirty_days_max', 'sixty_days_max'):
+        inventory[column] = pd.to_numeric(inventory[column], errors='coerce').astype('float64')
+    return inventory
+
+
+def family_min_size(family):
+    if BURSTABLE_FAMILY.match(family):
+        return BURSTABLE_MIN_SIZE
+    # Graviton families carry a 'g' after the generation, e.g. m6g, c7gn, r6gd.
+    generation_suffix = family.lstrip('abcdefghijklmnopqrstuvwxyz-').lstrip('0123456789')
+    if generation_suffix.startswith('g'):
+        return GRAVITON_MIN_SIZE
+    return DEFAULT_MIN_SIZE
+
+
+def downsize(instance_type, steps):
+    """Returns the type `steps` sizes smaller in the same family, or None if there is none."""
+    if not isinstance(instance_type, str) or '.' not in instance_type or steps <= 0:
+        return None
+    family, size = instance_type.split('.', 1)
+    if size not in SIZE_LADDER:
+        return None
+    index = SIZE_LADDER.index(size)
+    target = max(index - steps, SIZE_LADDER.index(family_min_size(family)))
+    return f"{family}.{SIZE_LADDER[target]}" if target < index else None
+
+
+def analyze_rightsizing(inventory, thresholds=None):
+    """
+    Flags instances in one vectorized pass over the inventory.
+
+    Only running instances with CPU aggregates are considered (NaN never passes a
+    threshold). Each instance gets at most one flag, checked in this order:
+    idle: 30-day average and maximum below idle_avg / idle_max; stop it.
+    underutilized: 30-day average and maximum below underutilized_avg / underutilized_max;
+        two sizes smaller.
+    oversized: 60-day maximum below oversized_max; one size smaller.
+    Underutilized and oversized instances already at their family's smallest size get
+    no recommendation (there is no type to move to).
+
+    Args:
+    inventory (DataFrame): Columns as returned by load_inventory.
+    thresholds (dict): Overrides for config.RIGHTSIZING_THRESHOLDS.
+
+    Returns:
+    DataFrame: One row per flagged instance with recommendation, recommended_type and reason.
+    """
+    limits = {**config.RIGHTSIZING_THRESHOLDS, **(thresholds or {})}
+    running = inventory['state'].eq('running').to_numpy()
+    avg_30 = inventory['thirty_days_avg'].to_numpy(dtype='float64', na_value=np.nan)
+    max_30 = inventory['thirty_days_max'].to_numpy(dtype='float64', na_value=np.nan)
+    max_60 = inventory['sixty_days_max'].to_numpy(dtype='float64', na_value=np.nan)
+
+    idle = running & (avg_30 < limits['idle_avg']) & (max_30 < limits['idle_max'])
+    underutilized = running & ~idle & (avg_30 < limits['underutilized_avg']) & (max_30 < limits['underutilized_max'])
+    oversized = running & ~idle & ~underutilized & (max_60 < limits['oversized_max'])
+    recommendation = np.select([idle, underutilized, oversized], ['idle', 'underutilized', 'oversized'], default='')
+    steps = np.select([underutilized, oversized], [DOWNSIZE_STEPS['underutilized'], DOWNSIZE_STEPS['oversized']], default=0)
+
+    flagged_mask = recommendation != ''
+    flagged = inventory.loc[flagged_mask].copy()
+    flagged['recommendation'] = recommendation[flagged_mask]
+    flagged['steps'] = steps[flagged_mask]
+    # Resolve targets once per distinct (instance_type, steps) pair, not once per instance.
+    targets = flagged[['instance_type', 'steps']].drop_duplicates()
+    targets['recommended_type'] = [
+        downsize(instance_type, step) for instance_type, step in zip(targets['instance_type'], targets['steps'])
+    ]
+    flagged = flagged.merge(targets, on=['instance_type', 'steps'], how='left')
+    resizable = flagged['recommendation'].eq('idle') | flagged['recommended_type'].notna()
+    flagged = flagged.loc[resizable].drop(columns=['steps', 'state']).reset_index(drop=True)
+    flagged['reason'] = (
+        '30d CPU avg ' + _percent_text(flagged['thirty_days_avg'])
+        + ' / max ' + _percent_text(flagged['thirty_days_max'])
+        + ', 60d max ' + _percent_text(flagged['sixty_days_max'])
+    )
+    return flagged
+
+
+def _percent_text(series):
+    values = series.to_numpy(dtype='float64', na_value=np.nan)
+    return pd.Series(np.where(np.isnan(values), 'n/a', np.char.mod('%.1f%%', values)), index=series.index)
+
+
+def write_recommendations(recommendations, generated_at):
+    """Upserts the recommendations and deletes those of instances no longer flagged.
+
+    Returns:
+    dict: Counts of 'inserted', 'updated', 'unchanged' and 'deleted' rows.
+    """
+    frame = recommendations.assign(generated_at=generated_at)
+    # NaN is not valid SQL; object dtype lets missing values become None.
+    records = frame.astype(object).where(frame.notna(), None).to_dict('records')
+    counts = bulk_upsert(RightsizingRecommendation, records, key='instance_id')
+    session = Session()
+    try:
+        counts['deleted'] = (
+            session.query(RightsizingRecommendation)
+            .filter(RightsizingRecommendation.generated_at < generated_at)
+            .delete(synchronize_session=False)
+        )
+        session.commit()
+    finally:
+        session.close()
+    return counts
+
+
+def run_rightsizing(thresholds=None):
+    """Loads the inventory, flags instances and writes rightsizing_recommendations.
+
+    Returns:
+    dict: Number of instances per recommendation.
+    """
+    generated_at = datetime.now(timezone.utc)
+    with telemetry.timed("analysis.rightsizing"):
+        inventory = load_inventory()
+        recommendations = analyze_rightsizing(inventory, thresholds)
+        write_recommendations(recommendations, generated_at)
+    summary = recommendations['recommendation'].value_counts().to_dict()
+    logger.info("Rightsizing flagged %s of %s instances: %s", len(recommendations), len(inventory), summary)
+    return summary
+
+# end of file
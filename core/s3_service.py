@@ -1,32 +1,97 @@
 # /core/s3_service.py
 """Module to interact with AWS S3 buckets."""
+from concurrent.futures import ThreadPoolExecutor
+from botocore.exceptions import ClientError
 from utils.logger import logger
 from core.service_base import ServiceBase
+from db.bulk import bulk_upsert
 from db.models import S3Buckets
+import config
+
+# Error codes meaning "not configured" rather than a failure.
+NOT_CONFIGURED_CODES = {'NoSuchTagSet', 'NoSuchLifecycleConfiguration'}
 
 class S3Service(ServiceBase):
     """Service to interact with AWS S3 buckets."""
-    def __init__(self, session, account_id):
-        self.client_s3 = session.client('s3')
+    def __init__(self, session, account_id, connector=None):
+        self.connector = connector
         self.account_id = account_id
-    
-    def fetch_properties(self):
-        """Fetches S3 bucket properties for the given account and region.
+        self.session = session
+        self.client_s3 = self.get_client(session, 's3')
+
+    def iter_pages(self):
+        """Yields the enriched bucket records; list_buckets returns them as a single page.
 
-        Returns:
-            list: A list of S3 bucket properties or an empty list if an error occurs.
+        Location, versioning, tagging and lifecycle are fetched for every bucket on a
+        pool of config.S3_ENRICH_WORKERS threads.
         """
+        response = self.client_s3.list_buckets()
+        buckets = response.get('Buckets', [])
+        logger.info("Fetched %s S3 buckets for account %s in region %s", len(buckets), self.account_id, self.client_s3.meta.region_name)
+        with ThreadPoolExecutor(max_workers=config.S3_ENRICH_WORKERS, thread_name_prefix=f"s3-{self.account_id}") as executor:
+            records = list(executor.map(self._enrich_bucket, buckets))
+        yield records
+
+    def write_records(self, records):
+        """Bulk-writes one page of bucket records to s3_buckets."""
+        return bulk_sync_s3buckets_to_db(records)
+
+    def _enrich_bucket(self, bucket):
+        """Builds the s3_buckets record for one bucket."""
+        name = bucket['Name']
+        location = self._safe_call(name, self.client_s3.get_bucket_location, default=None)
+        region = None
+        if location is not None:
+            # Buckets in us-east-1 report no constraint; 'EU' is the legacy name of eu-west-1.
+            region = {None: 'us-east-1', '': 'us-east-1', 'EU': 'eu-west-1'}.get(location.get('LocationConstraint'), location.get('LocationConstraint'))
+        # Per-region clients avoid a redirect round-trip for every call on non-home buckets.
+        client = self.get_client(self.session, 's3', region_name=region) if region and self.connector is not None else self.client_s3
+
+        versioning = self._safe_call(name, client.get_bucket_versioning, default=None)
+        tagging = self._safe_call(name, client.get_bucket_tagging, default={'TagSet': []})
+        lifecycle = self._safe_call(name, client.get_bucket_lifecycle_configuration, default={'Rules': []})
+        return {
+            'bucket_name': name,
+            'creation_date': bucket.get('CreationDate'),
+            'region': region,
+            'get_bucket_versioning': (
+                {key: value for key, value in versioning.items() if key != 'ResponseMetadata'}
+                if versioning is not None else None
+            ),
+            'tag_properties': {tag['Key']: tag['Value'] for tag in tagging['TagSet']} if tagging is not None else None,
+            'lifecycle_policy': _summarize_lifecycle(lifecycle['Rules']) if lifecycle is not None else None,
+            'account_id': self.account_id,
+        }
+
+    def _safe_call(self, bucket_name, method, default):
+        """Calls an S3 bucket API, mapping "not configured" errors to default and others to None."""
         try:
-            response = self.client_s3.list_buckets()
-            logger.info("Fetched S3 properties for account %s in region %s", self.account_id, self.client_s3.meta.region_name)
-            for bucket in response.get('Buckets', []):
-                bucket_versioning = self.client_s3.get_bucket_versioning(Bucket=bucket['Name'])
-                print(bucket_versioning)
-            #  I want to print buckets name
-            print("Buckets:", [bucket['Name'] for bucket in response.get('Buckets', [])])
-            return response.get('Buckets', [])
-        except Exception as e:
-            logger.error("Error fetching S3 properties: {str(%s)}", e)
-            return []
+            return method(Bucket=bucket_name)
+        except ClientError as e:
+            code = e.response.get('Error', {}).get('Code')
+            if code in NOT_CONFIGURED_CODES:
+                return default
+            if code in ('AccessDenied', 'AllAccessDisabled'):
+                logger.debug("%s denied for bucket %s", method.__name__, bucket_name)
+            else:
+                logger.warning("%s failed for bucket %s: %s", method.__name__, bucket_name, e)
+            return None
+
+
+def _summarize_lifecycle(rules):
+    """Condenses lifecycle rules into 'rule-id:Status' pairs that fit the lifecycle_policy column."""
+    if not rules:
+        return 'None'
+    summary = ', '.join(f"{rule.get('ID', 'unnamed')}:{rule.get('Status', 'Unknown')}" for rule in rules)
+    return summary[:256]
+
+
+def bulk_sync_s3buckets_to_db(buckets_props, chunk_size=None):
+    """Upserts S3 bucket records with multi-row INSERT ... ON CONFLICT (bucket_name) DO UPDATE.
+
+    Returns:
+    dict: Counts of 'inserted', 'updated' and 'unchanged' rows.
+    """
+    return bulk_upsert(S3Buckets, buckets_props, key='bucket_name', chunk_size=chunk_size)
+
 # This code defines a service to interact with AWS S3 buckets, similar to the EC2Service.
-            
\ No newline at end of file
@@ -1,10 +1,89 @@
 # /core/service_base.py
 """service_base.py"""
 
+from utils.logger import logger
+
 class ServiceBase:
     """Base class for AWS services."""
+    connector = None
+    account_id = None
+    region = None
+    # Client service name that has_resources() runs probe() against; None skips the probe.
+    probe_client = None
+
+    @classmethod
+    def has_resources(cls, session, region_name, connector=None, account_id=None):
+        """
+        Cheap probe run before the service is created in a region; returning False
+        skips the region. Collectors with a low-cost existence check set probe_client
+        and implement probe(). Probe failures return True so the collector itself decides.
+        """
+        if cls.probe_client is None:
+            return True
+        client = (
+            connector.get_client(session, cls.probe_client, region_name=region_name, account_id=account_id)
+            if connector is not None
+            else session.client(cls.probe_client, region_name=region_name)
+        )
+        try:
+            return cls.probe(client)
+        except Exception as e:
+            logger.warning("%s probe failed for account %s in region %s: %s", cls.__name__, account_id, region_name, e)
+            return True
+
+    @staticmethod
+    def probe(client):
+        """
+        Returns whether the region has at least one resource, using one small API call
+        on a probe_client client.
+        """
+        raise NotImplementedError("Subclasses that set probe_client must implement probe().")
+
     def fetch_properties(self):
         """
-        Fetches a property from the service.
+        Collects every page of iter_pages(), writes each with write_records() and
+        returns all the records.
+
+        Returns None when the collection failed, so the runner records the unit as
+        failed (and --resume or the work queue retries it) instead of done.
+        """
+        try:
+            records = []
+            for page_records in self.iter_pages():
+                self.write_records(page_records)
+                records.extend(page_records)
+            logger.info("%s fetched %s records for account %s in region %s",
+                        type(self).__name__, len(records), self.account_id, self.region)
+            return records
+        except Exception as e:
+            logger.error("Error fetching %s properties: %s", type(self).__name__, e)
+            return None
+
+    def iter_pages(self):
+        """
+        Yields normalized records page by page. Collectors implement this together with
+        write_records; older collectors that only override fetch_properties get its
+        whole result as one page.
+        """
+        if type(self).fetch_properties is ServiceBase.fetch_properties:
+            raise NotImplementedError("Subclasses must implement iter_pages() and write_records().")
+        records = self.fetch_properties()
+        if records is None:
+            raise RuntimeError(f"{type(self).__name__}.fetch_properties failed")
+        yield records
+
+    def write_records(self, records):
+        """
+        Persists one page from iter_pages and returns write counts, or None when the
+        collector has nothing to write (fetch_properties already persisted it).
+        """
+        return None
+
+    def get_client(self, session, service_name, region_name=None):
+        """
+        Returns a client from the connector's shared pool, or a plain session client
+        when the service was created without a connector.
         """
-        raise NotImplementedError("Subclasses must implement fetch+properties() method.")
+        if self.connector is not None:
+            return self.connector.get_client(session, service_name, region_name=region_name, account_id=self.account_id)
+        return session.client(service_name, region_name=region_name)
@@ -0,0 +1,224 @@
+# /core/snapshot_export.py
+"""Columnar Parquet snapshots of each inventory run for analytics reads."""
+
+from collections import defaultdict
+from datetime import datetime, timezone
+from decimal import Decimal
+import json
+import os
+import threading
+import uuid
+from sqlalchemy import JSON, TIMESTAMP, Boolean, Float, Integer, Numeric
+from db.models import EBSVolume, EC2Instance, LambdaFunction, S3Buckets
+from utils.logger import logger
+import config
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is optional; snapshots are skipped without it
+    pa = None
+    pq = None
+
+# Collector records are exported with the column types of these models.
+SNAPSHOT_MODELS = {
+    'ec2': EC2Instance,
+    's3': S3Buckets,
+    'lambda': LambdaFunction,
+    'ebs': EBSVolume,
+}
+# Low-cardinality strings stored as Arrow dictionaries and Parquet dictionary pages.
+DICTIONARY_COLUMNS = {
+    'ec2': [
+        'instance_type', 'state', 'availability_zone', 'usage_operation', 'platform', 'architecture',
+        'vpc_id', 'subnet_id', 'image_id', 'root_device_type', 'volume_type', 'volume_status',
+        'volume_encrypted', 'volume_delete_on_termination', 'ebs_optimized', 'monitoring_state',
+        'last_transition_reason',
+    ],
+    's3': ['lifecycle_policy'],
+    'lambda': ['runtime', 'package_type', 'architectures'],
+    'ebs': ['availability_zone', 'volume_type', 'state'],
+}
+# Records whose value shape differs from the DB column (which stores them as text/JSON).
+TYPE_OVERRIDES = {
+    'ec2': {'security_groups': 'list', 'tag_properties': 'map'},
+    's3': {'tag_properties': 'map', 'creation_date': 'timestamp'},
+    'ebs': {'tag_properties': 'map'},
+}
+# Partition keys live in the directory names, not in the files.
+PARTITION_COLUMNS = ('account_id', 'region')
+
+
+def create_snapshot_exporter(run_id, base_dir=None):
+    """Returns a SnapshotExporter, or None when snapshots are disabled or pyarrow is missing."""
+    if not config.SNAPSHOT_ENABLED:
+        return None
+    if pa is None:
+        logger.warning("pyarrow is not installed; Parquet snapshots are disabled")
+        return None
+    return SnapshotExporter(run_id, base_dir or config.SNAPSHOT_DIR)
+
+
+class SnapshotExporter:
+    """Runner record sink writing one Parquet file per partition.
+
+    Files are laid out as a hive-partitioned dataset per service:
+    <base_dir>/<service>/run_date=YYYY-MM-DD/account_id=<id>/region=<region>/<run_id>-<writer>.parquet
+
+    Pages are buffered per partition and written as row groups of about
+    config.SNAPSHOT_ROW_GROUP_ROWS rows; close() writes the rest and finishes the
+    files. <writer> is random per exporter, so worker processes of one run and
+    resumed runs never overwrite each other's files.
+    """
+
+    def __init__(self, run_id, base_dir, row_group_rows=None):
+        self.run_id = run_id
+        self.base_dir = base_dir
+        self.file_prefix = f"{run_id}-{uuid.uuid4().hex[:8]}"
+        self.run_date = datetime.now(timezone.utc).date().isoformat()
+        self.row_group_rows = row_group_rows or config.SNAPSHOT_ROW_GROUP_ROWS
+        self._lock = threading.Lock()
+        self._partitions = {}
+        self._schemas = {service: _arrow_schema(service, model) for service, model in SNAPSHOT_MODELS.items()}
+        self.files_written = 0
+        self.rows_written = 0
+
+    def __call__(self, service, account_id, region, records):
+        """Buffers one page of records; services without a snapshot schema are ignored."""
+        schema = self._schemas.get(service)
+        if schema is None or not records:
+            return
+        # S3 is collected once per account, so partition by each record's own account/region.
+        partitions = defaultdict(list)
+        for record in records:
+            partitions[(record.get('account_id') or account_id, record.get('region') or region or 'unknown')].append(record)
+        for (partition_account, partition_region), partition_records in partitions.items():
+            with self._lock:
+                partition = self._partitions.setdefault(
+                    (service, partition_account, partition_region), _Partition(service, partition_account, partition_region)
+                )
+            with partition.lock:
+                partition.records.extend(partition_records)
+                if len(partition.records) >= self.row_group_rows:
+                    self._flush(partition)
+
+    def _flush(self, partition):
+        """Writes the partition's buffered records as one row group; the caller holds partition.lock."""
+        if not partition.records:
+            return
+        schema = self._schemas[partition.service]
+        if partition.writer is None:
+            directory = os.path.join(
+                self.base_dir, partition.service, f"run_date={self.run_date}",
+                f"account_id={partition.account_id}", f"region={partition.region}",
+            )
+            os.makedirs(directory, exist_ok=True)
+            partition.writer = pq.ParquetWriter(
+                os.path.join(directory, f"{self.file_prefix}.parquet"), schema,
+                compression='zstd', use_dictionary=DICTIONARY_COLUMNS[partition.service],
+            )
+        table = pa.Table.from_arrays(
+            [_column_array(partition.records, field, self.run_id) for field in schema],
+            schema=schema,
+        )
+        partition.writer.write_table(table, row_group_size=len(partition.records))
+        with self._lock:
+            self.rows_written += len(partition.records)
+        partition.records = []
+
+    def close(self):
+        """Writes the buffered rows, finishes every file, logs the totals and returns {'files': .., 'rows': .., 'path': ..}."""
+        with self._lock:
+            partitions = list(self._partitions.values())
+            self._partitions = {}
+        for partition in partitions:
+            with partition.lock:
+                try:
+                    self._flush(partition)
+                except Exception as e:
+                    # One bad partition must not lose the other partitions' files.
+                    logger.exception("Snapshot of %s for account %s region %s failed: %s",
+                                     partition.service, partition.account_id, partition.region, e)
+                if partition.writer is not None:
+                    partition.writer.close()
+                    self.files_written += 1
+        logger.info("Wrote %s snapshot rows in %s Parquet files under %s", self.rows_written, self.files_written, self.base_dir)
+        return {'files': self.files_written, 'rows': self.rows_written, 'path': self.base_dir}
+
+
+class _Partition:
+    """Buffered records and the open Parquet file of one (service, account, region)."""
+
+    def __init__(self, service, account_id, region):
+        self.service = service
+        self.account_id = account_id
+        self.region = region
+        self.records = []
+        self.writer = None
+        self.lock = threading.Lock()
+
+
+def _arrow_schema(service, model):
+    """Maps the model's columns to Arrow types, leaving out DB-only and partition columns."""
+    overrides = TYPE_OVERRIDES.get(service, {})
+    dictionary_columns = set(DICTIONARY_COLUMNS.get(service, []))
+    fields = [pa.field('run_id', pa.dictionary(pa.int8(), pa.string()))]
+    for column in model.__table__.columns:
+        if column.primary_key or column.server_default is not None or column.name in PARTITION_COLUMNS or column.name == 'provider':
+            continue
+        kind = overrides.get(column.name)
+        if kind == 'list':
+            arrow_type = pa.list_(pa.string())
+        elif kind == 'map':
+            arrow_type = pa.map_(pa.string(), pa.string())
+        elif kind == 'timestamp':
+            arrow_type = pa.timestamp('us', tz='UTC')
+        elif isinstance(column.type, TIMESTAMP):
+            arrow_type = pa.timestamp('us', tz='UTC' if column.type.timezone else None)
+        elif isinstance(column.type, Boolean):
+            arrow_type = pa.bool_()
+        elif isinstance(column.type, Integer):
+            arrow_type = pa.int64()
+        elif isinstance(column.type, (Numeric, Float)):
+            arrow_type = pa.float64()
+        elif isinstance(column.type, JSON):
+            arrow_type = pa.string()
+        elif column.name in dictionary_columns:
+            arrow_type = pa.dictionary(pa.int32(), pa.string())
+        else:
+            arrow_type = pa.string()
+        fields.append(pa.field(column.name, arrow_type))
+    return pa.schema(fields)
+
+
+def _column_array(records, field, run_id):
+    """Builds one Arrow column, coercing the collectors' loosely typed values."""
+    if field.name == 'run_id':
+        values = [run_id] * len(records)
+    else:
+        values = [_coerce(record.get(field.name), field.type) for record in records]
+    if pa.types.is_dictionary(field.type):
+        return pa.array(values, type=pa.string()).dictionary_encode().cast(field.type)
+    return pa.array(values, type=field.type)
+
+
+def _coerce(value, arrow_type):
+    if value is None or value == 'N/A':
+        return None
+    if pa.types.is_map(arrow_type):
+        return [(str(key), str(item)) for key, item in value.items()] if isinstance(value, dict) else None
+    if pa.types.is_list(arrow_type):
+        return [str(item) for item in value] if isinstance(value, (list, tuple)) else [str(value)]
+    if pa.types.is_timestamp(arrow_type):
+        return value if isinstance(value, datetime) else None
+    if pa.types.is_boolean(arrow_type):
+        return bool(value)
+    if pa.types.is_integer(arrow_type):
+        return int(value)
+    if pa.types.is_floating(arrow_type):
+        return float(value) if isinstance(value, (int, float, Decimal, str)) else None
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, sort_keys=True, default=str)
+    return str(value)
+
+# end of file
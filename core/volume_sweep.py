@@ -0,0 +1,62 @@
+# /core/volume_sweep.py
+"""One describe_volumes sweep per account and region, shared by the EC2 and EBS collectors."""
+
+import threading
+import time
+from utils.logger import logger
+import config
+
+
+def sweep_volumes(ec2_client):
+    """Returns every volume of the client's region from one paginated describe_volumes sweep."""
+    volumes = []
+    paginator = ec2_client.get_paginator('describe_volumes')
+    for page in paginator.paginate(PaginationConfig={'PageSize': 500}):
+        volumes.extend(page.get('Volumes', []))
+    return volumes
+
+
+def region_volumes(ec2_client, account_id, region, connector=None):
+    """Returns the region's volumes, from the connector's shared sweep when there is a connector."""
+    sweeps = getattr(connector, 'volume_sweeps', None)
+    if sweeps is None:
+        return sweep_volumes(ec2_client)
+    return sweeps.get(ec2_client, account_id, region)
+
+
+class VolumeSweepCache:
+    """Complete describe_volumes sweeps by (account_id, region), kept for config.VOLUME_SWEEP_TTL_SECONDS.
+
+    The first collector to ask sweeps the region; one asking meanwhile waits for that
+    sweep instead of starting another. A sweep that fails is not kept, so callers only
+    ever see complete sweeps.
+    """
+
+    def __init__(self, ttl_seconds=None):
+        self.ttl_seconds = config.VOLUME_SWEEP_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self._sweeps = {}
+
+    def get(self, ec2_client, account_id, region):
+        key = (account_id, region)
+        with self._lock:
+            self._expire()
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            with self._lock:
+                sweep = self._sweeps.get(key)
+            if sweep is not None:
+                return sweep[1]
+            volumes = sweep_volumes(ec2_client)
+            logger.info("Swept %s EBS volumes for account %s in region %s", len(volumes), account_id, region)
+            with self._lock:
+                self._sweeps[key] = (time.monotonic(), volumes)
+            return volumes
+
+    def _expire(self):
+        cutoff = time.monotonic() - self.ttl_seconds
+        for key in [key for key, (swept_at, _) in self._sweeps.items() if swept_at < cutoff]:
+            del self._sweeps[key]
+
+# end of file
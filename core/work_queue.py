@@ -0,0 +1,328 @@
+# /core/work_queue.py
+"""Postgres-backed work queue for collecting one run with many worker processes.
+
+A coordinator enqueues the run's (account, region, service) units in work_items.
+Workers on any node claim them with SELECT ... FOR UPDATE SKIP LOCKED, so concurrent
+claims never block on or return the same row, and heartbeat their claims while they
+work. Claims whose heartbeat is older than config.WORK_QUEUE_STALE_SECONDS (a killed
+or hung worker) go back to the queue, up to config.WORK_QUEUE_MAX_ATTEMPTS claims.
+All timestamps come from the database clock, so node clock skew does not matter.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+import os
+import socket
+import threading
+import time
+from sqlalchemy import and_, case, func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from db.init_db import Session
+from db.models import WorkItem
+from utils.logger import logger
+import config
+
+UNIT_KEY = ['run_id', 'account_id', 'region', 'service']
+# Items in these states still need a worker.
+OUTSTANDING_STATUSES = ('queued', 'claimed')
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def latest_queued_run_id():
+    """Returns the run_id of the most recently enqueued run, or None."""
+    session = Session()
+    try:
+        row = session.query(WorkItem.run_id).order_by(WorkItem.id.desc()).first()
+        return row[0] if row else None
+    finally:
+        session.close()
+
+
+class WorkQueue:
+    """The work_items of one run_id."""
+
+    def __init__(self, run_id):
+        self.run_id = run_id
+
+    def enqueue(self, units):
+        """Queues (account_id, region, service) units; units already in the run are kept as they are.
+
+        Returns:
+            int: The number of units newly queued.
+        """
+        rows = [
+            {'run_id': self.run_id, 'account_id': account_id, 'region': region, 'service': service, 'status': 'queued', 'attempts': 0}
+            for account_id, region, service in units
+        ]
+        queued = 0
+        session = Session()
+        try:
+            for start in range(0, len(rows), config.DB_BATCH_SIZE):
+                stmt = pg_insert(WorkItem.__table__).values(rows[start:start + config.DB_BATCH_SIZE])
+                queued += session.execute(stmt.on_conflict_do_nothing(index_elements=UNIT_KEY)).rowcount
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            logger.error("Error enqueuing work items for run %s: %s", self.run_id, e)
+            raise
+        finally:
+            session.close()
+        logger.info("Queued %s of %s work items for run %s", queued, len(rows), self.run_id)
+        return queued
+
+    def claim(self, worker_id, limit=1):
+        """Claims up to `limit` queued items for worker_id.
+
+        Returns:
+            list: (id, account_id, region, service) tuples of the claimed items.
+        """
+        claimable = (
+            select(WorkItem.id)
+            .where(WorkItem.run_id == self.run_id, WorkItem.status == 'queued')
+            .order_by(WorkItem.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        stmt = (
+            update(WorkItem)
+            .where(WorkItem.id.in_(claimable))
+            .values(
+                status='claimed', worker_id=worker_id, attempts=WorkItem.attempts + 1,
+                claimed_at=func.now(), heartbeat_at=func.now(),
+            )
+            .returning(WorkItem.id, WorkItem.account_id, WorkItem.region, WorkItem.service)
+        )
+        session = Session()
+        try:
+            items = [tuple(row) for row in session.execute(stmt)]
+            session.commit()
+            return items
+        finally:
+            session.close()
+
+    def heartbeat(self, worker_id):
+        """Refreshes heartbeat_at of every item worker_id holds in the run."""
+        return self._update(
+            and_(WorkItem.worker_id == worker_id, WorkItem.status == 'claimed'),
+            heartbeat_at=func.now(),
+        )
+
+    def complete(self, item_id, worker_id, status, records=None, error=None, max_attempts=None):
+        """Marks a claimed item done, or failed.
+
+        A failed item goes back to the queue while it has claims left (at most
+        config.WORK_QUEUE_MAX_ATTEMPTS), so a throttled or denied unit is retried.
+        Only the current claim holder can complete an item, so a worker whose claim went
+        stale and was handed to another worker does not overwrite the new claim.
+
+        Returns:
+            str: The item's new status ('done', 'queued' or 'failed'), or None if
+            worker_id no longer held the claim.
+        """
+        max_attempts = config.WORK_QUEUE_MAX_ATTEMPTS if max_attempts is None else max_attempts
+        values = {'records': records, 'error': error and str(error)[:512], 'finished_at': func.now()}
+        if status == 'failed':
+            retry = WorkItem.attempts < max_attempts
+            values.update(
+                status=case((retry, 'queued'), else_='failed'),
+                worker_id=case((retry, None), else_=WorkItem.worker_id),
+                finished_at=case((retry, None), else_=func.now()),
+            )
+        else:
+            values['status'] = status
+        stmt = (
+            update(WorkItem)
+            .where(
+                WorkItem.run_id == self.run_id, WorkItem.id == item_id,
+                WorkItem.worker_id == worker_id, WorkItem.status == 'claimed',
+            )
+            .values(**values)
+            .returning(WorkItem.status)
+        )
+        session = Session()
+        try:
+            new_status = session.execute(stmt).scalar()
+            session.commit()
+            return new_status
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def reclaim_stale(self, stale_seconds=None, max_attempts=None):
+        """Requeues claims without a recent heartbeat; fails those out of attempts.
+
+        Returns:
+            int: The number of items requeued or failed.
+        """
+        stale_seconds = config.WORK_QUEUE_STALE_SECONDS if stale_seconds is None else stale_seconds
+        max_attempts = config.WORK_QUEUE_MAX_ATTEMPTS if max_attempts is None else max_attempts
+        stale = and_(
+            WorkItem.status == 'claimed',
+            WorkItem.heartbeat_at < func.now() - timedelta(seconds=stale_seconds),
+        )
+        requeued = self._update(and_(stale, WorkItem.attempts < max_attempts), status='queued', worker_id=None)
+        failed = self._update(
+            and_(stale, WorkItem.attempts >= max_attempts),
+            status='failed', error=f"claim went stale {max_attempts} times", finished_at=func.now(),
+        )
+        if requeued or failed:
+            logger.warning("Run %s: requeued %s stale work items, failed %s", self.run_id, requeued, failed)
+        return requeued + failed
+
+    def summary(self):
+        """Returns {status: items} for the run."""
+        session = Session()
+        try:
+            rows = (
+                session.query(WorkItem.status, func.count())
+                .filter(WorkItem.run_id == self.run_id)
+                .group_by(WorkItem.status)
+                .all()
+            )
+            return dict(rows)
+        finally:
+            session.close()
+
+    def results(self):
+        """Returns {region: {account_id: {service: {'records': n}}}} for the completed items."""
+        session = Session()
+        try:
+            rows = (
+                session.query(WorkItem.region, WorkItem.account_id, WorkItem.service, WorkItem.records)
+                .filter(WorkItem.run_id == self.run_id, WorkItem.status == 'done')
+                .order_by(WorkItem.id)
+                .all()
+            )
+        finally:
+            session.close()
+        results = {}
+        for region, account_id, service, records in rows:
+            results.setdefault(region, {}).setdefault(account_id, {})[service] = {'records': records or 0}
+        return results
+
+    def outstanding(self):
+        """Returns the number of items still queued or claimed."""
+        summary = self.summary()
+        return sum(summary.get(status, 0) for status in OUTSTANDING_STATUSES)
+
+    def started_at(self):
+        """Returns when the run was enqueued, shared by all its workers as collected_at."""
+        session = Session()
+        try:
+            return session.query(func.min(WorkItem.created_at)).filter(WorkItem.run_id == self.run_id).scalar()
+        finally:
+            session.close()
+
+    def _update(self, condition, **values):
+        session = Session()
+        try:
+            rowcount = session.execute(
+                update(WorkItem).where(WorkItem.run_id == self.run_id, condition).values(**values)
+            ).rowcount
+            session.commit()
+            return rowcount
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+
+class Heartbeat:
+    """Background thread heartbeating a worker's claims every config.WORK_QUEUE_HEARTBEAT_SECONDS."""
+
+    def __init__(self, queue, worker_id, interval=None):
+        self.queue = queue
+        self.worker_id = worker_id
+        self.interval = interval or config.WORK_QUEUE_HEARTBEAT_SECONDS
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._beat, name="finops-heartbeat", daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+    def _beat(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.queue.heartbeat(self.worker_id)
+            except Exception as e:
+                # A missed beat only matters once the claim goes stale; keep trying.
+                logger.error("Heartbeat failed for worker %s: %s", self.worker_id, e)
+
+
+def run_worker(queue, runner, worker_id=None, threads=None, poll_seconds=None):
+    """Claims and runs work items with runner.run_unit() until the run has none outstanding.
+
+    Each of the `threads` loops claims one item at a time. An idle worker keeps polling
+    while other workers hold claims, since those may go stale and come back.
+
+    Returns:
+        dict: Items this worker finished as 'done' or 'failed', failed attempts put back
+        in the queue ('retried'), and claims it had lost to a reclaim ('lost').
+    """
+    worker_id = worker_id or default_worker_id()
+    threads = threads or config.WORK_QUEUE_WORKER_THREADS
+    poll_seconds = config.WORK_QUEUE_POLL_SECONDS if poll_seconds is None else poll_seconds
+    counts = {'done': 0, 'failed': 0, 'retried': 0, 'lost': 0}
+    lock = threading.Lock()
+
+    def _loop():
+        while True:
+            items = queue.claim(worker_id)
+            if not items:
+                queue.reclaim_stale()
+                if not queue.outstanding():
+                    return
+                time.sleep(poll_seconds)
+                continue
+            item_id, account_id, region, service = items[0]
+            try:
+                data = runner.run_unit({"Id": account_id}, region, service)
+            except Exception as e:
+                logger.exception("Work item %s (%s/%s/%s) raised: %s", item_id, account_id, region, service, e)
+                data, error = None, e
+            else:
+                error = None if data is not None else "collection failed"
+            status = 'done' if data is not None else 'failed'
+            records = len(data) if isinstance(data, list) else None
+            new_status = queue.complete(item_id, worker_id, status, records=records, error=error)
+            with lock:
+                counts[{'queued': 'retried', None: 'lost'}.get(new_status, new_status)] += 1
+
+    logger.info("Worker %s processing run %s with %s threads", worker_id, queue.run_id, threads)
+    with Heartbeat(queue, worker_id):
+        with ThreadPoolExecutor(max_workers=threads, thread_name_prefix="finops-worker") as executor:
+            for future in [executor.submit(_loop) for _ in range(threads)]:
+                future.result()
+    logger.info("Worker %s finished run %s: %s", worker_id, queue.run_id, counts)
+    return counts
+
+
+def wait_for_queue(queue, poll_seconds=None):
+    """Blocks until the run has no outstanding items, reclaiming stale claims meanwhile.
+
+    Returns:
+        dict: The final {status: items} summary.
+    """
+    poll_seconds = config.WORK_QUEUE_POLL_SECONDS if poll_seconds is None else poll_seconds
+    while True:
+        queue.reclaim_stale()
+        summary = queue.summary()
+        outstanding = sum(summary.get(status, 0) for status in OUTSTANDING_STATUSES)
+        if not outstanding:
+            return summary
+        logger.info("Run %s work items: %s", queue.run_id, summary)
+        time.sleep(poll_seconds)
+
+# end of file
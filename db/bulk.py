@@ -0,0 +1,118 @@
+"""Bulk PostgreSQL upserts shared by the inventory writers."""
+
+from sqlalchemy import JSON, cast, column, literal_column, or_, update, values
+from sqlalchemy.dialects.postgresql import JSONB, insert as pg_insert
+from db.init_db import Session
+from utils.logger import logger
+from utils.telemetry import telemetry
+import config
+
+
+def bulk_upsert(model, records, key, chunk_size=None):
+    """Upserts dicts into model's table with multi-row INSERT ... ON CONFLICT (key) DO UPDATE.
+
+    Rows are only rewritten when at least one column differs from the stored value, and
+    each chunk is committed once. Keys that are not columns of the table are ignored.
+
+    Args:
+    model: Declarative model class of the target table.
+    records (list): Dicts to write; the last one wins when a key value repeats.
+    key (str or tuple): Column(s) of the unique constraint used as the conflict target.
+    chunk_size (int): Rows per statement, defaults to config.DB_BATCH_SIZE.
+
+    Returns:
+    dict: Counts of 'inserted', 'updated' and 'unchanged' rows.
+    """
+    counts = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+    if not records:
+        return counts
+    chunk_size = chunk_size or config.DB_BATCH_SIZE
+    table = model.__table__
+    model_columns = set(c.name for c in table.columns) - {'id', 'created_at'}
+    columns = sorted(set(col for record in records for col in record) & model_columns)
+    key_columns = [key] if isinstance(key, str) else list(key)
+    update_columns = [col for col in columns if col not in key_columns]
+    # ON CONFLICT cannot touch the same row twice in one statement, so the last record per key wins.
+    unique_records = list({tuple(record[col] for col in key_columns): record for record in records}.values())
+    counts['unchanged'] += len(records) - len(unique_records)
+
+    session = Session()
+    try:
+        for offset in range(0, len(unique_records), chunk_size):
+            chunk = unique_records[offset:offset + chunk_size]
+            stmt = pg_insert(table).values([{col: record.get(col) for col in columns} for record in chunk])
+            changed = [
+                # json has no equality operator in PostgreSQL, compare as jsonb instead.
+                cast(table.c[col], JSONB).is_distinct_from(cast(stmt.excluded[col], JSONB))
+                if isinstance(table.c[col].type, JSON)
+                else table.c[col].is_distinct_from(stmt.excluded[col])
+                for col in update_columns
+            ]
+            if update_columns:
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=key_columns,
+                    set_={col: stmt.excluded[col] for col in update_columns},
+                    where=or_(*changed),
+                )
+            else:
+                stmt = stmt.on_conflict_do_nothing(index_elements=key_columns)
+            stmt = stmt.returning(table.c[key_columns[0]], literal_column('(xmax = 0)').label('inserted'))
+            with telemetry.timed(f"db.{table.name}"):
+                written = session.execute(stmt).all()
+                session.commit()
+            inserted = sum(1 for row in written if row.inserted)
+            counts['inserted'] += inserted
+            counts['updated'] += len(written) - inserted
+            counts['unchanged'] += len(chunk) - len(written)
+    except Exception as e:
+        session.rollback()
+        logger.error("Error bulk syncing %s: %s", table.name, e)
+        raise
+    finally:
+        session.close()
+    logger.info("Synced %s: %s inserted, %s updated, %s unchanged",
+                table.name, counts['inserted'], counts['updated'], counts['unchanged'])
+    return counts
+
+
+def bulk_update_columns(model, records, key, columns, chunk_size=None):
+    """Updates only `columns` of existing rows with one UPDATE ... FROM (VALUES ...) per chunk.
+
+    Meant for narrow, frequently changing fields of rows that are otherwise unchanged;
+    rows whose values already match are not rewritten and missing keys are ignored
+    (nothing is inserted). JSON columns are not supported.
+
+    Returns:
+    int: The number of rows updated.
+    """
+    if not records:
+        return 0
+    chunk_size = chunk_size or config.DB_BATCH_SIZE
+    table = model.__table__
+    source_columns = [key, *columns]
+    updated = 0
+    session = Session()
+    try:
+        for offset in range(0, len(records), chunk_size):
+            chunk = records[offset:offset + chunk_size]
+            source = values(
+                *(column(col, table.c[col].type) for col in source_columns), name='source'
+            ).data([tuple(record.get(col) for col in source_columns) for record in chunk])
+            # An all-NULL VALUES column is inferred as text; cast every source column to its table type.
+            typed = {col: cast(source.c[col], table.c[col].type) for col in source_columns}
+            stmt = (
+                update(table)
+                .where(table.c[key] == typed[key])
+                .where(or_(*(table.c[col].is_distinct_from(typed[col]) for col in columns)))
+                .values({col: typed[col] for col in columns})
+            )
+            with telemetry.timed(f"db.{table.name}.columns"):
+                updated += session.execute(stmt).rowcount
+                session.commit()
+    except Exception as e:
+        session.rollback()
+        logger.error("Error updating %s columns of %s: %s", ', '.join(columns), table.name, e)
+        raise
+    finally:
+        session.close()
+    return updated
@@ -0,0 +1,228 @@
+"""Append-only EC2 inventory history in the monthly-partitioned ec2_instance_history table."""
+
+from datetime import date, datetime, time, timedelta, timezone
+import re
+import threading
+from sqlalchemy import func, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from db.init_db import Session
+from db.models import EC2InstanceHistory
+from utils.logger import logger
+from utils.telemetry import telemetry
+import config
+
+HISTORY_TABLE = EC2InstanceHistory.__tablename__
+PARTITION_NAME = re.compile(rf"^{HISTORY_TABLE}_y(\d{{4}})m(\d{{2}})$")
+HISTORY_COLUMNS = [
+    column.name for column in EC2InstanceHistory.__table__.columns
+    if column.name not in ('collected_on', 'collected_at', 'run_id')
+]
+
+
+def _month_start(day):
+    return day.replace(day=1)
+
+
+def _next_month(day):
+    return (day.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+
+def partition_name(month_start):
+    return f"{HISTORY_TABLE}_y{month_start.year:04d}m{month_start.month:02d}"
+
+
+def ensure_history_partitions(day=None, months_ahead=None):
+    """Creates the monthly partitions covering day's month and months_ahead after it."""
+    month = _month_start(day or datetime.now(timezone.utc).date())
+    months_ahead = config.HISTORY_PARTITIONS_AHEAD if months_ahead is None else months_ahead
+    session = Session()
+    try:
+        for _ in range(months_ahead + 1):
+            upper = _next_month(month)
+            session.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF {HISTORY_TABLE} "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{upper.isoformat()}')"
+            ))
+            month = upper
+        session.commit()
+    except Exception as e:
+        session.rollback()
+        logger.error("Error creating %s partitions: %s", HISTORY_TABLE, e)
+        raise
+    finally:
+        session.close()
+
+
+def drop_expired_history_partitions(retention_days=None):
+    """Drops the monthly partitions whose whole range is older than retention_days.
+
+    Returns:
+    list: The names of the dropped partitions.
+    """
+    retention_days = config.HISTORY_RETENTION_DAYS if retention_days is None else retention_days
+    cutoff = datetime.now(timezone.utc).date() - timedelta(days=retention_days)
+    session = Session()
+    dropped = []
+    try:
+        names = session.execute(text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE parent.relname = :parent"
+        ), {'parent': HISTORY_TABLE}).scalars().all()
+        for name in sorted(names):
+            match = PARTITION_NAME.match(name)
+            if not match:
+                continue
+            if _next_month(date(int(match.group(1)), int(match.group(2)), 1)) <= cutoff:
+                # Dropping a partition is a metadata operation; no row-by-row DELETE or vacuum.
+                session.execute(text(f"DROP TABLE IF EXISTS {name}"))
+                dropped.append(name)
+        session.commit()
+        logger.info("Dropped %s expired %s partitions before %s", len(dropped), HISTORY_TABLE, cutoff)
+        return dropped
+    except Exception as e:
+        session.rollback()
+        logger.error("Error dropping expired %s partitions: %s", HISTORY_TABLE, e)
+        return dropped
+    finally:
+        session.close()
+
+
+def create_history_sink(run_id, collected_at=None):
+    """Returns a HistorySink for the run, or None when history mode is disabled.
+
+    Processes sharing one run pass the same collected_at to keep the run consistent.
+    """
+    if not config.HISTORY_ENABLED:
+        return None
+    sink = HistorySink(run_id, collected_at)
+    ensure_history_partitions(sink.collected_on)
+    return sink
+
+
+class HistorySink:
+    """Runner record sink appending every collected EC2 record to ec2_instance_history.
+
+    All rows of one run share collected_at, so a run is a consistent snapshot.
+    """
+
+    def __init__(self, run_id, collected_at=None):
+        self.run_id = run_id
+        self.collected_at = collected_at or datetime.now(timezone.utc)
+        self.collected_on = self.collected_at.date()
+        self._lock = threading.Lock()
+        self.rows_written = 0
+
+    def __call__(self, service, account_id, region, records):
+        if service != 'ec2' or not records:
+            return
+        rows = [
+            {
+                **{column: record.get(column) for column in HISTORY_COLUMNS},
+                'account_id': record.get('account_id') or account_id,
+                'region': record.get('region') or region,
+                'run_id': self.run_id,
+                'collected_on': self.collected_on,
+                'collected_at': self.collected_at,
+            }
+            for record in records
+        ]
+        written = append_history_rows(rows)
+        with self._lock:
+            self.rows_written += written
+
+
+def append_history_rows(rows, chunk_size=None):
+    """Inserts history rows with multi-row INSERTs; rows already stored for the run are skipped.
+
+    Returns:
+    int: The number of rows inserted.
+    """
+    chunk_size = chunk_size or config.DB_BATCH_SIZE
+    table = EC2InstanceHistory.__table__
+    inserted = 0
+    session = Session()
+    try:
+        for offset in range(0, len(rows), chunk_size):
+            stmt = pg_insert(table).values(rows[offset:offset + chunk_size]).on_conflict_do_nothing(
+                index_elements=['collected_on', 'instance_id', 'run_id']
+            )
+            with telemetry.timed(f"db.{table.name}"):
+                inserted += session.execute(stmt).rowcount
+                session.commit()
+    except Exception as e:
+        session.rollback()
+        logger.error("Error appending %s rows: %s", table.name, e)
+        raise
+    finally:
+        session.close()
+    return inserted
+
+
+def _as_of_query(session, entities, as_of, lookback_days):
+    """Query over the rows of the latest run per account/region collected at or before as_of.
+
+    DISTINCT ON picks each account/region's latest run; the collected_on range on both
+    sides lets PostgreSQL prune every partition outside the lookback window.
+    """
+    window = EC2InstanceHistory.collected_on.between(as_of.date() - timedelta(days=lookback_days), as_of.date())
+    latest = (
+        session.query(
+            EC2InstanceHistory.account_id,
+            EC2InstanceHistory.region,
+            EC2InstanceHistory.run_id,
+            EC2InstanceHistory.collected_on,
+        )
+        .filter(window, EC2InstanceHistory.collected_at <= as_of)
+        .distinct(EC2InstanceHistory.account_id, EC2InstanceHistory.region)
+        .order_by(EC2InstanceHistory.account_id, EC2InstanceHistory.region, EC2InstanceHistory.collected_at.desc())
+        .subquery()
+    )
+    return (
+        session.query(*entities)
+        .join(
+            latest,
+            (EC2InstanceHistory.account_id == latest.c.account_id)
+            & (EC2InstanceHistory.region == latest.c.region)
+            & (EC2InstanceHistory.run_id == latest.c.run_id)
+            & (EC2InstanceHistory.collected_on == latest.c.collected_on),
+        )
+        .filter(window)
+    )
+
+
+def _as_of_datetime(as_of):
+    if isinstance(as_of, datetime):
+        return as_of if as_of.tzinfo else as_of.replace(tzinfo=timezone.utc)
+    # A date means "as of the end of that day".
+    return datetime.combine(as_of, time.max, tzinfo=timezone.utc)
+
+
+def instances_as_of(as_of, account_id=None, lookback_days=None):
+    """Returns the EC2InstanceHistory rows of the latest snapshot of each account/region as of a date or datetime."""
+    lookback_days = config.HISTORY_ASOF_LOOKBACK_DAYS if lookback_days is None else lookback_days
+    session = Session()
+    try:
+        query = _as_of_query(session, [EC2InstanceHistory], _as_of_datetime(as_of), lookback_days)
+        if account_id:
+            query = query.filter(EC2InstanceHistory.account_id == account_id)
+        return query.all()
+    finally:
+        session.close()
+
+
+def instance_type_counts_as_of(as_of, state='running', lookback_days=None):
+    """Returns {instance_type: count} for instances in `state` as of a date or datetime,
+    e.g. how many m5.xlarge were running at the end of last month."""
+    lookback_days = config.HISTORY_ASOF_LOOKBACK_DAYS if lookback_days is None else lookback_days
+    session = Session()
+    try:
+        query = _as_of_query(
+            session, [EC2InstanceHistory.instance_type, func.count()], _as_of_datetime(as_of), lookback_days
+        ).group_by(EC2InstanceHistory.instance_type)
+        if state:
+            query = query.filter(EC2InstanceHistory.state == state)
+        return dict(query.all())
+    finally:
+        session.close()
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, JSON, TIMESTAMP
+from sqlalchemy import Column, Integer, BigInteger, Boolean, String, ForeignKey, JSON, TIMESTAMP, Date, Float, Numeric, UniqueConstraint, Index
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -19,16 +20,21 @@ class Account(Base):
 
 class EC2Instance(Base):
     __tablename__ = 'ec2_instances'
+    __table_args__ = (
+        Index('ix_ec2_instances_account_region_state', 'account_id', 'region', 'state'),
+        Index('ix_ec2_instances_instance_type_state', 'instance_type', 'state'),
+        Index('ix_ec2_instances_tag_properties', 'tag_properties', postgresql_using='gin', postgresql_ops={'tag_properties': 'jsonb_path_ops'}),
+    )
     id = Column(Integer, primary_key=True)
     instance_id = Column(String(32), unique=True, nullable=False)
-    creation_time = Column(String(64))
+    creation_time = Column(TIMESTAMP(timezone=True))
     instance_type = Column(String(128))
     state = Column(String(128))
-    state_code = Column(String(32))
-    last_transition_date = Column(String(64))
-    aging = Column(String(64))
+    state_code = Column(Integer)
+    last_transition_date = Column(TIMESTAMP(timezone=True))
+    aging = Column(Integer)
     last_transition_reason = Column(String(128))
-    launch_update_time = Column(String(64))
+    launch_update_time = Column(TIMESTAMP(timezone=True))
     availability_zone = Column(String(128))
     mac_address = Column(String(64))
     network_interface_id = Column(String(128))
@@ -43,7 +49,7 @@ class EC2Instance(Base):
     vpc_id = Column(String(32))
     image_id = Column(String(64))
     security_groups = Column(String(128))
-    tag_properties = Column(JSON)
+    tag_properties = Column(JSONB)
     instance_name = Column(String(128))
     region = Column(String(32))
     root_device_type = Column(String(64))
@@ -51,39 +57,45 @@ class EC2Instance(Base):
     instance_type = Column(String(64))
     # name_tag = Column(String(128))
     volume_type = Column(String(64))
-    volume_size = Column(String(20))
-    volume_iops = Column(String(20))
+    volume_size = Column(Integer)
+    volume_iops = Column(Integer)
     volume_instance_name = Column(String(128))
     volume_device = Column(String(64))
     volume_status = Column(String(64))
     volume_encrypted = Column(String(64))
-    volume_attach_time = Column(String(64))
+    volume_attach_time = Column(TIMESTAMP(timezone=True))
     volume_delete_on_termination = Column(String(64))
-    network_attach_time = Column(String(64))
+    network_attach_time = Column(TIMESTAMP(timezone=True))
     ebs_optimized = Column(String(64))
     private_dns_name = Column(String(128))
     public_dns_name = Column(String(128))
     monitoring_state = Column(String(64))
     created_at = Column(TIMESTAMP, server_default=func.now())
-    thirty_days_avg = Column(String(10))
-    thirty_days_max = Column(String(10))
-    thirty_days_min = Column(String(10))
-    sixty_days_avg = Column(String(10))
-    sixty_days_max = Column(String(10))
-    sixty_days_min = Column(String(10))
+    thirty_days_avg = Column(Numeric(6, 2))
+    thirty_days_max = Column(Numeric(6, 2))
+    thirty_days_min = Column(Numeric(6, 2))
+    sixty_days_avg = Column(Numeric(6, 2))
+    sixty_days_max = Column(Numeric(6, 2))
+    sixty_days_min = Column(Numeric(6, 2))
     provider = Column(String(32), default='aws')
+    # sha256 of the normalized collector record, used to skip unchanged rows
+    fingerprint = Column(String(64))
 
     account = relationship("Account", back_populates="instances")
     
 class S3Buckets(Base):
     """Model for S3 Buckets."""
     __tablename__ = 's3_buckets'
+    __table_args__ = (
+        Index('ix_s3_buckets_account_region', 'account_id', 'region'),
+        Index('ix_s3_buckets_tag_properties', 'tag_properties', postgresql_using='gin', postgresql_ops={'tag_properties': 'jsonb_path_ops'}),
+    )
     id = Column(Integer, primary_key=True)
     bucket_name = Column(String(128), unique=True, nullable=False)
     creation_date = Column(String(64))
     region = Column(String(32))
     get_bucket_versioning = Column(JSON)
-    tag_properties = Column(JSON)
+    tag_properties = Column(JSONB)
     lifecycle_policy = Column(String(256))
     classifiable_object_count = Column(String(24))
     classifiable_size_bytes = Column(String(32))
@@ -93,4 +105,233 @@ class S3Buckets(Base):
     provider = Column(String(32), default='aws')
     created_at = Column(TIMESTAMP, server_default=func.now())
 
-    account = relationship("Account", back_populates="s3_buckets_relationship")
\ No newline at end of file
+    account = relationship("Account", back_populates="s3_buckets_relationship")
+
+
+class InstanceMetricDaily(Base):
+    """Per-instance daily CloudWatch rollup used to compute the utilization windows."""
+    __tablename__ = 'instance_metric_daily'
+    __table_args__ = (
+        UniqueConstraint('instance_id', 'metric_name', 'day', name='uq_instance_metric_daily'),
+    )
+    id = Column(Integer, primary_key=True)
+    instance_id = Column(String(32), nullable=False)
+    metric_name = Column(String(64), nullable=False)
+    day = Column(Date, nullable=False)
+    average = Column(Float)
+    maximum = Column(Float)
+    minimum = Column(Float)
+    # 0 marks a day that was fetched but had no datapoints
+    sample_count = Column(Float, nullable=False, default=0)
+    created_at = Column(TIMESTAMP, server_default=func.now())
+
+
+class EC2InstanceHistory(Base):
+    """Append-only per-run EC2 snapshot rows, range-partitioned by collection date.
+
+    Monthly partitions are created and dropped by db.history; ec2_instances keeps
+    only the current state.
+    """
+    __tablename__ = 'ec2_instance_history'
+    __table_args__ = (
+        Index('ix_ec2_instance_history_account_region_collected_at', 'account_id', 'region', 'collected_at'),
+        Index('ix_ec2_instance_history_instance_type_state', 'instance_type', 'state'),
+        {'postgresql_partition_by': 'RANGE (collected_on)'},
+    )
+    # The partition key has to be part of the primary key.
+    collected_on = Column(Date, primary_key=True)
+    instance_id = Column(String(32), primary_key=True)
+    run_id = Column(String(32), primary_key=True)
+    collected_at = Column(TIMESTAMP(timezone=True), nullable=False)
+    account_id = Column(String(32), nullable=False)
+    region = Column(String(32), nullable=False)
+    instance_type = Column(String(64))
+    state = Column(String(128))
+    availability_zone = Column(String(128))
+    platform = Column(String(64))
+    instance_name = Column(String(128))
+    vpc_id = Column(String(32))
+    volume_size = Column(Integer)
+    volume_iops = Column(Integer)
+    thirty_days_avg = Column(Numeric(6, 2))
+    thirty_days_max = Column(Numeric(6, 2))
+    sixty_days_avg = Column(Numeric(6, 2))
+    sixty_days_max = Column(Numeric(6, 2))
+    tag_properties = Column(JSONB)
+    fingerprint = Column(String(64))
+
+
+class RightsizingRecommendation(Base):
+    """Latest rightsizing flag per EC2 instance, rewritten by core.rightsizing on every analysis."""
+    __tablename__ = 'rightsizing_recommendations'
+    __table_args__ = (
+        Index('ix_rightsizing_recommendations_account_region', 'account_id', 'region'),
+    )
+    id = Column(Integer, primary_key=True)
+    instance_id = Column(String(32), unique=True, nullable=False)
+    account_id = Column(String(32))
+    region = Column(String(32))
+    instance_type = Column(String(64))
+    # idle, underutilized or oversized
+    recommendation = Column(String(32), nullable=False)
+    # None for idle instances, which should be stopped rather than resized
+    recommended_type = Column(String(64))
+    thirty_days_avg = Column(Numeric(6, 2))
+    thirty_days_max = Column(Numeric(6, 2))
+    sixty_days_max = Column(Numeric(6, 2))
+    reason = Column(String(256))
+    generated_at = Column(TIMESTAMP(timezone=True), nullable=False)
+    created_at = Column(TIMESTAMP, server_default=func.now())
+
+
+class EC2CostEstimate(Base):
+    """Latest on-demand monthly cost estimate per EC2 instance, written by core.pricing."""
+    __tablename__ = 'ec2_cost_estimates'
+    __table_args__ = (
+        Index('ix_ec2_cost_estimates_account_region', 'account_id', 'region'),
+    )
+    id = Column(Integer, primary_key=True)
+    instance_id = Column(String(32), unique=True, nullable=False)
+    account_id = Column(String(32))
+    region = Column(String(32))
+    instance_type = Column(String(64))
+    usage_operation = Column(String(64))
+    volume_type = Column(String(64))
+    volume_size = Column(Integer)
+    # USD; NULL when the price list has no matching rate
+    hourly_price = Column(Numeric(12, 6))
+    compute_monthly = Column(Numeric(12, 2))
+    storage_monthly = Column(Numeric(12, 2))
+    total_monthly = Column(Numeric(12, 2))
+    estimated_at = Column(TIMESTAMP(timezone=True), nullable=False)
+    created_at = Column(TIMESTAMP, server_default=func.now())
+
+
+class LambdaFunction(Base):
+    """Lambda function inventory with invocation metrics over metric_window_days."""
+    __tablename__ = 'lambda_functions'
+    __table_args__ = (
+        Index('ix_lambda_functions_account_region', 'account_id', 'region'),
+    )
+    id = Column(Integer, primary_key=True)
+    function_arn = Column(String(256), unique=True, nullable=False)
+    function_name = Column(String(128), nullable=False)
+    account_id = Column(String(32), ForeignKey('accounts.account_id'))
+    region = Column(String(32))
+    runtime = Column(String(32))
+    package_type = Column(String(16))
+    architectures = Column(String(32))
+    memory_size = Column(Integer)
+    timeout = Column(Integer)
+    code_size = Column(BigInteger)
+    ephemeral_storage = Column(Integer)
+    handler = Column(String(256))
+    role = Column(String(256))
+    last_modified = Column(TIMESTAMP(timezone=True))
+    metric_window_days = Column(Integer)
+    invocations = Column(Float)
+    errors = Column(Float)
+    throttles = Column(Float)
+    avg_duration_ms = Column(Float)
+    max_duration_ms = Column(Float)
+    provider = Column(String(32), default='aws')
+    created_at = Column(TIMESTAMP, server_default=func.now())
+
+
+class EBSVolume(Base):
+    """EBS volume inventory with orphan flags; attachments live in ebs_volume_attachments."""
+    __tablename__ = 'ebs_volumes'
+    __table_args__ = (
+        Index('ix_ebs_volumes_account_region', 'account_id', 'region'),
+        Index('ix_ebs_volumes_is_orphaned', 'is_orphaned'),
+    )
+    id = Column(Integer, primary_key=True)
+    volume_id = Column(String(32), unique=True, nullable=False)
+    account_id = Column(String(32), ForeignKey('accounts.account_id'))
+    region = Column(String(32))
+    availability_zone = Column(String(32))
+    volume_type = Column(String(16))
+    size_gb = Column(Integer)
+    iops = Column(Integer)
+    throughput = Column(Integer)
+    encrypted = Column(Boolean)
+    state = Column(String(16))
+    snapshot_id = Column(String(32))
+    multi_attach_enabled = Column(Boolean)
+    create_time = Column(TIMESTAMP(timezone=True))
+    tag_properties = Column(JSONB)
+    # Unattached ('available') volumes, when they were first seen detached, and since how long
+    is_orphaned = Column(Boolean, nullable=False, default=False)
+    detached_since = Column(TIMESTAMP(timezone=True))
+    detached_days = Column(Integer)
+    long_detached = Column(Boolean, nullable=False, default=False)
+    provider = Column(String(32), default='aws')
+    created_at = Column(TIMESTAMP, server_default=func.now())
+
+    attachments = relationship("EBSVolumeAttachment", back_populates="volume", cascade="all, delete-orphan")
+
+
+class EBSVolumeAttachment(Base):
+    """One row per volume/instance attachment; instance_id matches ec2_instances.instance_id."""
+    __tablename__ = 'ebs_volume_attachments'
+    __table_args__ = (
+        UniqueConstraint('volume_id', 'instance_id', name='uq_ebs_volume_attachments'),
+        Index('ix_ebs_volume_attachments_instance_id', 'instance_id'),
+    )
+    id = Column(Integer, primary_key=True)
+    volume_id = Column(String(32), ForeignKey('ebs_volumes.volume_id', ondelete='CASCADE'), nullable=False)
+    instance_id = Column(String(32), nullable=False)
+    device = Column(String(64))
+    state = Column(String(16))
+    attach_time = Column(TIMESTAMP(timezone=True))
+    delete_on_termination = Column(Boolean)
+    created_at = Column(TIMESTAMP, server_default=func.now())
+
+    volume = relationship("EBSVolume", back_populates="attachments")
+
+
+class RunLedgerEntry(Base):
+    """State of one (run_id, account, region, service) collection unit, used to resume runs."""
+    __tablename__ = 'run_ledger'
+    __table_args__ = (
+        UniqueConstraint('run_id', 'account_id', 'region', 'service', name='uq_run_ledger_unit'),
+        Index('ix_run_ledger_run_id_status', 'run_id', 'status'),
+    )
+    id = Column(Integer, primary_key=True)
+    run_id = Column(String(32), nullable=False)
+    account_id = Column(String(32), nullable=False)
+    region = Column(String(32), nullable=False)
+    service = Column(String(32), nullable=False)
+    # pending, running, done, skipped (probe found nothing) or failed
+    status = Column(String(16), nullable=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    records = Column(Integer)
+    error = Column(String(512))
+    started_at = Column(TIMESTAMP(timezone=True))
+    finished_at = Column(TIMESTAMP(timezone=True))
+    duration_ms = Column(Integer)
+    created_at = Column(TIMESTAMP, server_default=func.now())
+
+
+class WorkItem(Base):
+    """One (run_id, account, region, service) unit in the distributed collection queue."""
+    __tablename__ = 'work_items'
+    __table_args__ = (
+        UniqueConstraint('run_id', 'account_id', 'region', 'service', name='uq_work_items_unit'),
+        Index('ix_work_items_run_id_status', 'run_id', 'status', 'id'),
+    )
+    id = Column(Integer, primary_key=True)
+    run_id = Column(String(32), nullable=False)
+    account_id = Column(String(32), nullable=False)
+    region = Column(String(32), nullable=False)
+    service = Column(String(32), nullable=False)
+    # queued, claimed, done or failed
+    status = Column(String(16), nullable=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    worker_id = Column(String(128))
+    claimed_at = Column(TIMESTAMP(timezone=True))
+    heartbeat_at = Column(TIMESTAMP(timezone=True))
+    finished_at = Column(TIMESTAMP(timezone=True))
+    records = Column(Integer)
+    error = Column(String(512))
+    created_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
@@ -0,0 +1,26 @@
+"""Refreshes the fleet summary materialized views used by the dashboards."""
+
+from sqlalchemy import text
+from db.init_db import Session
+from utils.logger import logger
+from utils.telemetry import telemetry
+
+# Created by migration 3d9f6c2b8e14; each has a unique index so it can refresh concurrently.
+# mv_ec2_fleet_summary's idle_count uses config.RIGHTSIZING_THRESHOLDS' idle rule (migration 6e4a2c9f1d07).
+FLEET_SUMMARY_VIEWS = ('mv_ec2_fleet_summary', 'mv_s3_bucket_summary')
+
+
+def refresh_fleet_summaries(concurrently=True):
+    """Refreshes every fleet summary view; CONCURRENTLY keeps them readable during the refresh."""
+    session = Session()
+    try:
+        for view in FLEET_SUMMARY_VIEWS:
+            with telemetry.timed(f"db.refresh.{view}"):
+                session.execute(text(f"REFRESH MATERIALIZED VIEW {'CONCURRENTLY ' if concurrently else ''}{view}"))
+                session.commit()
+            logger.info("Refreshed materialized view %s", view)
+    except Exception as e:
+        session.rollback()
+        logger.error("Error refreshing fleet summaries: %s", e)
+    finally:
+        session.close()
@@ -0,0 +1,133 @@
+"""Run ledger: per (run_id, account, region, service) unit state for resumable runs."""
+
+from datetime import datetime, timezone
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from db.init_db import Session
+from db.models import RunLedgerEntry
+from utils.logger import logger
+
+UNIT_KEY = ['run_id', 'account_id', 'region', 'service']
+# Units in these states are not run again on --resume.
+COMPLETED_STATUSES = ('done', 'skipped')
+
+
+def latest_run_id():
+    """Returns the run_id of the most recently started run in the ledger, or None."""
+    session = Session()
+    try:
+        row = (
+            session.query(RunLedgerEntry.run_id)
+            .order_by(RunLedgerEntry.created_at.desc(), RunLedgerEntry.id.desc())
+            .first()
+        )
+        return row[0] if row else None
+    finally:
+        session.close()
+
+
+class RunLedger:
+    """Records unit state transitions for one run_id.
+
+    Every call is a single small upsert in its own transaction, so the ledger stays
+    correct if the process is killed at any point.
+    """
+
+    def __init__(self, run_id):
+        self.run_id = run_id
+        self._completed = None
+
+    def completed_units(self):
+        """Returns the (account_id, region, service) units already done or skipped in this run."""
+        if self._completed is None:
+            session = Session()
+            try:
+                rows = (
+                    session.query(RunLedgerEntry.account_id, RunLedgerEntry.region, RunLedgerEntry.service)
+                    .filter(RunLedgerEntry.run_id == self.run_id, RunLedgerEntry.status.in_(COMPLETED_STATUSES))
+                    .all()
+                )
+                self._completed = {tuple(row) for row in rows}
+            finally:
+                session.close()
+        return self._completed
+
+    def is_completed(self, account_id, region, service):
+        return (account_id, region, service) in self.completed_units()
+
+    def mark_pending(self, units):
+        """Registers (account_id, region, service) units that are about to run."""
+        rows = [
+            {'run_id': self.run_id, 'account_id': account_id, 'region': region, 'service': service, 'status': 'pending'}
+            for account_id, region, service in units
+        ]
+        if rows:
+            # Existing units keep their state and attempt count.
+            self._execute(pg_insert(RunLedgerEntry.__table__).values(rows).on_conflict_do_nothing(index_elements=UNIT_KEY))
+
+    def start(self, account_id, region, service):
+        now = datetime.now(timezone.utc)
+        table = RunLedgerEntry.__table__
+        stmt = pg_insert(table).values(
+            run_id=self.run_id, account_id=account_id, region=region, service=service,
+            status='running', attempts=1, started_at=now,
+        )
+        self._execute(stmt.on_conflict_do_update(
+            index_elements=UNIT_KEY,
+            set_={
+                'status': 'running',
+                'attempts': table.c.attempts + 1,
+                'started_at': now,
+                'finished_at': None,
+                'duration_ms': None,
+                'error': None,
+            },
+        ))
+
+    def finish(self, account_id, region, service, status, records=None, error=None):
+        """Marks a unit done, skipped or failed, with its record count or error."""
+        now = datetime.now(timezone.utc)
+        table = RunLedgerEntry.__table__
+        stmt = pg_insert(table).values(
+            run_id=self.run_id, account_id=account_id, region=region, service=service,
+            status=status, attempts=1, records=records, error=error and str(error)[:512],
+            started_at=now, finished_at=now, duration_ms=0,
+        )
+        self._execute(stmt.on_conflict_do_update(
+            index_elements=UNIT_KEY,
+            set_={
+                'status': status,
+                'records': records,
+                'error': stmt.excluded.error,
+                'finished_at': now,
+                'duration_ms': func.floor(func.extract('epoch', now - func.coalesce(table.c.started_at, now)) * 1000),
+            },
+        ))
+        if status in COMPLETED_STATUSES and self._completed is not None:
+            self._completed.add((account_id, region, service))
+
+    def summary(self):
+        """Returns {status: units} for the run."""
+        session = Session()
+        try:
+            rows = (
+                session.query(RunLedgerEntry.status, func.count())
+                .filter(RunLedgerEntry.run_id == self.run_id)
+                .group_by(RunLedgerEntry.status)
+                .all()
+            )
+            return dict(rows)
+        finally:
+            session.close()
+
+    def _execute(self, stmt):
+        session = Session()
+        try:
+            session.execute(stmt)
+            session.commit()
+        except Exception as e:
+            # A ledger failure must not fail the collection itself.
+            session.rollback()
+            logger.error("Error updating run ledger for run %s: %s", self.run_id, e)
+        finally:
+            session.close()
@@ -1,13 +1,17 @@
 # main.py
 
-from core.aws_connector import AWSConnector
-from core.org_manager import AWSOrgManager
-from core.core_service_runner import AWSServiceRunner
-from db.init_db import Session, Base, engine
-from db.models import Account, EC2Instance
+import argparse
+import os
+import subprocess
+import sys
+import uuid
 # from integrations.db_handler import DBHandler
 import config
+# The AWS, database and analysis modules are imported where they are used, after the
+# arguments are parsed, so --help and narrow --services runs only load what they need.
+
 def sync_account_to_db(db_session, account):
+    from db.models import Account
     acct_obj = db_session.query(Account).filter_by(account_id=account["Id"]).first()
     if not acct_obj:
         acct_obj = Account(account_id=account["Id"], account_name=account.get("Name", None), email=account.get("Email", None), org_unit=account.get("OrgUnit", None))
@@ -15,37 +19,179 @@ def sync_account_to_db(db_session, account):
         db_session.commit()
     return acct_obj
 
-def main():
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Collect FinOps inventory across AWS accounts and regions.")
+    parser.add_argument("--regions", nargs="+", default=None,
+                        help="regions to collect (default config.AWS_REGION); with --discover-regions, a filter")
+    parser.add_argument("--discover-regions", action="store_true", default=config.AUTO_DISCOVER_REGIONS,
+                        help="discover each account's enabled regions with describe_regions")
+    parser.add_argument("--resume", nargs="?", const="latest", default=None, metavar="RUN_ID",
+                        help="finish an interrupted run (default the latest), skipping the units it completed")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--coordinator", action="store_true",
+                      help="queue the run's units in work_items for --worker processes and wait for them")
+    mode.add_argument("--worker", nargs="?", const="latest", default=None, metavar="RUN_ID",
+                      help="claim and collect work items of a queued run (default the latest) until none are left")
+    parser.add_argument("--local-workers", type=int, default=0, metavar="N",
+                        help="with --coordinator, also start N worker processes on this host")
+    parser.add_argument("--services", nargs="+", default=config.CORE_SERVICES, choices=sorted(config.SERVICE_MAP),
+                        metavar="SERVICE", help="services to collect (default config.CORE_SERVICES)")
+    return parser.parse_args(argv)
+
+def coordinate(args, runner, regions):
+    """Queues the run's units and waits until the workers have collected all of them."""
+    from core.work_queue import WorkQueue, wait_for_queue
+    queue = WorkQueue(runner.run_id)
+    queue.enqueue(runner.plan_units(regions=regions, discover=args.discover_regions))
+    worker_args = ["--worker", runner.run_id, "--services", *args.services]
+    worker_args += ["--regions", *args.regions] if args.regions else []
+    workers = [
+        subprocess.Popen([sys.executable, os.path.abspath(__file__), *worker_args])
+        for _ in range(args.local_workers)
+    ]
+    print(f"Work items: {wait_for_queue(queue)}")
+    for worker in workers:
+        worker.wait()
+    return queue.results()
+
+def work(args, connector, base_session, home_region):
+    """Worker mode: collects work items of a queued run; the coordinator does the rest."""
+    from core.core_service_runner import AWSServiceRunner
+    from core.snapshot_export import create_snapshot_exporter
+    from core.work_queue import WorkQueue, default_worker_id, latest_queued_run_id, run_worker
+    from db.history import create_history_sink
+    from db.run_ledger import RunLedger
+    from utils.telemetry import telemetry
+    run_id = latest_queued_run_id() if args.worker == "latest" else args.worker
+    if not run_id:
+        raise SystemExit("No queued run in work_items")
+    queue = WorkQueue(run_id)
+    worker_id = default_worker_id()
+    snapshot_exporter = create_snapshot_exporter(run_id)
+    history_sink = create_history_sink(run_id, collected_at=queue.started_at())
+    runner = AWSServiceRunner(
+        base_session,
+        connector,
+        home_region,
+        args.services,
+        [],
+        config.ASSUME_ROLE_NAME,
+        run_id=run_id,
+        sinks=[sink for sink in (snapshot_exporter, history_sink) if sink],
+        ledger=RunLedger(run_id) if config.RUN_LEDGER_ENABLED else None,
+    )
+    counts = run_worker(queue, runner, worker_id=worker_id)
+    print(f"Worker {worker_id} work items for run {run_id}: {counts}")
+    snapshot = snapshot_exporter.close() if snapshot_exporter else None
+    if snapshot:
+        print(f"Snapshot: {snapshot['rows']} rows in {snapshot['files']} Parquet files under {snapshot['path']}")
+    if history_sink:
+        print(f"History: {history_sink.rows_written} rows appended to ec2_instance_history")
+    print(f"API calls, throttles and retries: {connector.rate_limiter.totals()}")
+    telemetry.write_report(
+        config.TELEMETRY_REPORT_DIR,
+        name=f"worker-{os.getpid()}",
+        run_id=run_id,
+        worker_id=worker_id,
+        work_items=counts,
+        rate_limiter=connector.rate_limiter.totals(),
+        snapshot=snapshot,
+    )
+
+def main(argv=None):
     """Main function to run AWS services across accounts and regions."""
+    args = parse_args(argv)
+    from core.aws_connector import AWSConnector
+    from core.org_manager import AWSOrgManager
+    from core.core_service_runner import AWSServiceRunner
+    from core.snapshot_export import create_snapshot_exporter
+    from core.metric_rollup import prune_metric_rollups
+    from db.init_db import Session
+    from db.reporting import refresh_fleet_summaries
+    from db.history import create_history_sink, drop_expired_history_partitions
+    from db.run_ledger import RunLedger, latest_run_id
+    from utils.telemetry import telemetry
+
+    home_region = (args.regions or config.AWS_REGION)[0]
     # Initialize AWS connector
-    connector = AWSConnector(region_name=config.AWS_REGION[0])
+    connector = AWSConnector(region_name=home_region)
     base_session = connector.get_session(profile_name=config.AWS_PROFILE)
-    
+    if args.worker:
+        return work(args, connector, base_session, home_region)
+
     org_mgr = AWSOrgManager(base_session)
     accounts = org_mgr.get_all_accounts()
     # Create tables if not exits
-    # Base.metadata.create_all(engine)
+    # Base.metadata.create_all(get_engine())
     
     db_session = Session()
         
     for account in accounts:
         sync_account_to_db(db_session, account)
         
-    for region in config.AWS_REGION:
-        runner = AWSServiceRunner(
-            base_session,
-            connector,
-            region,
-            config.CORE_SERVICES,
-            accounts,
-            config.ASSUME_ROLE_NAME
-        )
-    result = runner.run()
-    print(f"Result for region: {region}")
-    for acc_id, svc_data in result.items():
-        print(f"  Account ID: {acc_id}")
-        for svc, items in svc_data.items():
-            print(f"    Service: {svc}: {len(items)}")
+    run_id = uuid.uuid4().hex
+    if args.resume:
+        run_id = latest_run_id() if args.resume == "latest" else args.resume
+        if not run_id:
+            raise SystemExit("No run to resume in run_ledger")
+        print(f"Resuming run {run_id}")
+    ledger = RunLedger(run_id) if config.RUN_LEDGER_ENABLED or args.resume else None
+    # In coordinator mode the workers collect and write the snapshots and history.
+    snapshot_exporter = None if args.coordinator else create_snapshot_exporter(run_id)
+    history_sink = None if args.coordinator else create_history_sink(run_id)
+    runner = AWSServiceRunner(
+        base_session,
+        connector,
+        home_region,
+        args.services,
+        accounts,
+        config.ASSUME_ROLE_NAME,
+        run_id=run_id,
+        sinks=[sink for sink in (snapshot_exporter, history_sink) if sink],
+        ledger=ledger,
+    )
+    regions = args.regions or (None if args.discover_regions else config.AWS_REGION)
+    if args.coordinator:
+        results = coordinate(args, runner, regions)
+    else:
+        results = runner.run_regions(regions=regions, discover=args.discover_regions)
+    for region, result in results.items():
+        print(f"Result for region: {region}")
+        for acc_id, svc_data in result.items():
+            print(f"  Account ID: {acc_id}")
+            for svc, items in svc_data.items():
+                # Streaming mode returns a summary dict instead of the records
+                print(f"    Service: {svc}: {items['records'] if isinstance(items, dict) else len(items)}")
+    snapshot = snapshot_exporter.close() if snapshot_exporter else None
+    if snapshot:
+        print(f"Snapshot: {snapshot['rows']} rows in {snapshot['files']} Parquet files under {snapshot['path']}")
+    if ledger:
+        print(f"Run {run_id} units: {ledger.summary()}")
+    print(f"API calls, throttles and retries: {connector.rate_limiter.totals()}")
+    if config.METRIC_ROLLUP_ENABLED:
+        prune_metric_rollups(config.METRIC_ROLLUP_RETENTION_DAYS)
+    if history_sink:
+        print(f"History: {history_sink.rows_written} rows appended to ec2_instance_history")
+    if config.HISTORY_ENABLED:
+        drop_expired_history_partitions(config.HISTORY_RETENTION_DAYS)
+    # The EC2 analyses (and pandas) are only needed when EC2 was collected.
+    if config.RIGHTSIZING_ENABLED and "ec2" in args.services:
+        from core.rightsizing import run_rightsizing
+        print(f"Rightsizing: {run_rightsizing()}")
+    if config.PRICE_LIST_FILE and "ec2" in args.services:
+        from core.pricing import run_cost_estimates
+        print(f"Cost estimates: {run_cost_estimates()}")
+    refresh_fleet_summaries()
+    report_path = telemetry.write_report(
+        config.TELEMETRY_REPORT_DIR,
+        run_id=run_id,
+        accounts=len(accounts),
+        regions=sorted(results),
+        services=args.services,
+        rate_limiter=connector.rate_limiter.totals(),
+        snapshot=snapshot,
+    )
+    print(f"Run report: {report_path}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,90 @@
+"""reporting indexes and fleet summary materialized views
+
+Revision ID: 3d9f6c2b8e14
+Revises: e5b8a1f07c62
+Create Date: 2026-10-17 12:41:52.306117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3d9f6c2b8e14'
+down_revision: Union[str, Sequence[str], None] = 'e5b8a1f07c62'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# An instance counts as idle when it is running and its 30-day average CPU is below 5%.
+EC2_FLEET_SUMMARY_SQL = """
+CREATE MATERIALIZED VIEW mv_ec2_fleet_summary AS
+SELECT
+    COALESCE(account_id, 'unknown') AS account_id,
+    COALESCE(region, 'unknown') AS region,
+    COALESCE(instance_type, 'unknown') AS instance_type,
+    count(*) AS instance_count,
+    count(*) FILTER (WHERE state = 'running') AS running_count,
+    count(*) FILTER (WHERE state = 'stopped') AS stopped_count,
+    COALESCE(sum(volume_size), 0) AS total_volume_gb,
+    count(*) FILTER (WHERE state = 'running' AND thirty_days_avg < 5) AS idle_count,
+    round(avg(thirty_days_avg), 2) AS avg_cpu_30d,
+    now() AS refreshed_at
+FROM ec2_instances
+GROUP BY 1, 2, 3
+"""
+
+S3_BUCKET_SUMMARY_SQL = """
+CREATE MATERIALIZED VIEW mv_s3_bucket_summary AS
+SELECT
+    COALESCE(account_id, 'unknown') AS account_id,
+    COALESCE(region, 'unknown') AS region,
+    count(*) AS bucket_count,
+    count(*) FILTER (WHERE get_bucket_versioning::jsonb ->> 'Status' = 'Enabled') AS versioned_count,
+    count(*) FILTER (WHERE tag_properties IS NOT NULL AND tag_properties <> '{}'::jsonb) AS tagged_count,
+    count(*) FILTER (WHERE lifecycle_policy IS NOT NULL AND lifecycle_policy <> 'None') AS lifecycle_count,
+    now() AS refreshed_at
+FROM s3_buckets
+GROUP BY 1, 2
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # jsonb is required for GIN indexes on the tag columns.
+    for table in ('ec2_instances', 's3_buckets'):
+        op.alter_column(table, 'tag_properties',
+                   existing_type=sa.JSON(),
+                   type_=postgresql.JSONB(astext_type=sa.Text()),
+                   existing_nullable=True,
+                   postgresql_using='tag_properties::jsonb')
+    op.create_index('ix_ec2_instances_account_region_state', 'ec2_instances', ['account_id', 'region', 'state'], unique=False)
+    op.create_index('ix_ec2_instances_instance_type_state', 'ec2_instances', ['instance_type', 'state'], unique=False)
+    op.create_index('ix_ec2_instances_tag_properties', 'ec2_instances', ['tag_properties'], unique=False, postgresql_using='gin', postgresql_ops={'tag_properties': 'jsonb_path_ops'})
+    op.create_index('ix_s3_buckets_account_region', 's3_buckets', ['account_id', 'region'], unique=False)
+    op.create_index('ix_s3_buckets_tag_properties', 's3_buckets', ['tag_properties'], unique=False, postgresql_using='gin', postgresql_ops={'tag_properties': 'jsonb_path_ops'})
+
+    op.execute(EC2_FLEET_SUMMARY_SQL)
+    # Unique indexes allow REFRESH MATERIALIZED VIEW CONCURRENTLY.
+    op.execute("CREATE UNIQUE INDEX ux_mv_ec2_fleet_summary ON mv_ec2_fleet_summary (account_id, region, instance_type)")
+    op.execute(S3_BUCKET_SUMMARY_SQL)
+    op.execute("CREATE UNIQUE INDEX ux_mv_s3_bucket_summary ON mv_s3_bucket_summary (account_id, region)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS mv_s3_bucket_summary")
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS mv_ec2_fleet_summary")
+    op.drop_index('ix_s3_buckets_tag_properties', table_name='s3_buckets', postgresql_using='gin')
+    op.drop_index('ix_s3_buckets_account_region', table_name='s3_buckets')
+    op.drop_index('ix_ec2_instances_tag_properties', table_name='ec2_instances', postgresql_using='gin')
+    op.drop_index('ix_ec2_instances_instance_type_state', table_name='ec2_instances')
+    op.drop_index('ix_ec2_instances_account_region_state', table_name='ec2_instances')
+    for table in ('ec2_instances', 's3_buckets'):
+        op.alter_column(table, 'tag_properties',
+                   existing_type=postgresql.JSONB(astext_type=sa.Text()),
+                   type_=sa.JSON(),
+                   existing_nullable=True,
+                   postgresql_using='tag_properties::json')
@@ -0,0 +1,59 @@
+"""fleet summary idle_count matches rightsizing
+
+Revision ID: 6e4a2c9f1d07
+Revises: f3c7d9a1e5b6
+Create Date: 2026-10-17 23:08:14.402917
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6e4a2c9f1d07'
+down_revision: Union[str, Sequence[str], None] = 'f3c7d9a1e5b6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Must equal the idle_* entries of config.RIGHTSIZING_THRESHOLDS (tests/test_reporting.py
+# checks it); changing those needs a new migration recreating the view.
+IDLE_THRESHOLDS = {'idle_avg': 2.0, 'idle_max': 5.0}
+
+EC2_FLEET_SUMMARY_SQL = """
+CREATE MATERIALIZED VIEW mv_ec2_fleet_summary AS
+SELECT
+    COALESCE(account_id, 'unknown') AS account_id,
+    COALESCE(region, 'unknown') AS region,
+    COALESCE(instance_type, 'unknown') AS instance_type,
+    count(*) AS instance_count,
+    count(*) FILTER (WHERE state = 'running') AS running_count,
+    count(*) FILTER (WHERE state = 'stopped') AS stopped_count,
+    COALESCE(sum(volume_size), 0) AS total_volume_gb,
+    count(*) FILTER (WHERE {idle}) AS idle_count,
+    round(avg(thirty_days_avg), 2) AS avg_cpu_30d,
+    now() AS refreshed_at
+FROM ec2_instances
+GROUP BY 1, 2, 3
+"""
+# Same rule as core.rightsizing's idle flag.
+IDLE_CONDITION = "state = 'running' AND thirty_days_avg < {idle_avg} AND thirty_days_max < {idle_max}".format(**IDLE_THRESHOLDS)
+# The definition created by 3d9f6c2b8e14.
+PREVIOUS_IDLE_CONDITION = "state = 'running' AND thirty_days_avg < 5"
+
+
+def _recreate_ec2_fleet_summary(idle_condition):
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS mv_ec2_fleet_summary")
+    op.execute(EC2_FLEET_SUMMARY_SQL.format(idle=idle_condition))
+    op.execute("CREATE UNIQUE INDEX ux_mv_ec2_fleet_summary ON mv_ec2_fleet_summary (account_id, region, instance_type)")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _recreate_ec2_fleet_summary(IDLE_CONDITION)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _recreate_ec2_fleet_summary(PREVIOUS_IDLE_CONDITION)
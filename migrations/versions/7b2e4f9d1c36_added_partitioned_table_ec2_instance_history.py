@@ -0,0 +1,58 @@
+"""added partitioned table ec2_instance_history
+
+Revision ID: 7b2e4f9d1c36
+Revises: 3d9f6c2b8e14
+Create Date: 2026-10-17 14:08:51.402237
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7b2e4f9d1c36'
+down_revision: Union[str, Sequence[str], None] = '3d9f6c2b8e14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Monthly partitions are created at run time by db.history.ensure_history_partitions.
+    op.create_table('ec2_instance_history',
+    sa.Column('collected_on', sa.Date(), nullable=False),
+    sa.Column('instance_id', sa.String(length=32), nullable=False),
+    sa.Column('run_id', sa.String(length=32), nullable=False),
+    sa.Column('collected_at', sa.TIMESTAMP(timezone=True), nullable=False),
+    sa.Column('account_id', sa.String(length=32), nullable=False),
+    sa.Column('region', sa.String(length=32), nullable=False),
+    sa.Column('instance_type', sa.String(length=64), nullable=True),
+    sa.Column('state', sa.String(length=128), nullable=True),
+    sa.Column('availability_zone', sa.String(length=128), nullable=True),
+    sa.Column('platform', sa.String(length=64), nullable=True),
+    sa.Column('instance_name', sa.String(length=128), nullable=True),
+    sa.Column('vpc_id', sa.String(length=32), nullable=True),
+    sa.Column('volume_size', sa.Integer(), nullable=True),
+    sa.Column('volume_iops', sa.Integer(), nullable=True),
+    sa.Column('thirty_days_avg', sa.Numeric(precision=6, scale=2), nullable=True),
+    sa.Column('thirty_days_max', sa.Numeric(precision=6, scale=2), nullable=True),
+    sa.Column('sixty_days_avg', sa.Numeric(precision=6, scale=2), nullable=True),
+    sa.Column('sixty_days_max', sa.Numeric(precision=6, scale=2), nullable=True),
+    sa.Column('tag_properties', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column('fingerprint', sa.String(length=64), nullable=True),
+    sa.PrimaryKeyConstraint('collected_on', 'instance_id', 'run_id'),
+    postgresql_partition_by='RANGE (collected_on)'
+    )
+    op.create_index('ix_ec2_instance_history_account_region_collected_at', 'ec2_instance_history', ['account_id', 'region', 'collected_at'], unique=False)
+    op.create_index('ix_ec2_instance_history_instance_type_state', 'ec2_instance_history', ['instance_type', 'state'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_ec2_instance_history_instance_type_state', table_name='ec2_instance_history')
+    op.drop_index('ix_ec2_instance_history_account_region_collected_at', table_name='ec2_instance_history')
+    # Dropping the parent drops every partition.
+    op.drop_table('ec2_instance_history')
@@ -0,0 +1,65 @@
+"""native typed columns ec2_instances
+
+Revision ID: e5b8a1f07c62
+Revises: c41e7d2a9b53
+Create Date: 2026-10-17 11:20:05.774310
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b8a1f07c62'
+down_revision: Union[str, Sequence[str], None] = 'c41e7d2a9b53'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# column -> (previous String type, new type, USING expression).
+# Placeholders such as 'N/A', 'Unknown' or 'Error' become NULL.
+INTEGER_USING = "CASE WHEN {col} ~ '^-?[0-9]+$' THEN {col}::integer END"
+NUMERIC_USING = "CASE WHEN {col} ~ '^-?[0-9]+(\\.[0-9]+)?$' THEN round({col}::numeric, 2) END"
+TIMESTAMP_USING = "CASE WHEN {col} ~ '^[0-9]{{4}}-[0-9]{{2}}-[0-9]{{2}}' THEN {col}::timestamptz END"
+
+COLUMNS = {
+    'creation_time': (sa.String(length=64), sa.TIMESTAMP(timezone=True), TIMESTAMP_USING),
+    'state_code': (sa.String(length=32), sa.Integer(), INTEGER_USING),
+    'last_transition_date': (sa.String(length=64), sa.TIMESTAMP(timezone=True), TIMESTAMP_USING),
+    'aging': (sa.String(length=64), sa.Integer(), INTEGER_USING),
+    'launch_update_time': (sa.String(length=64), sa.TIMESTAMP(timezone=True), TIMESTAMP_USING),
+    'volume_size': (sa.String(length=20), sa.Integer(), INTEGER_USING),
+    'volume_iops': (sa.String(length=20), sa.Integer(), INTEGER_USING),
+    'volume_attach_time': (sa.String(length=64), sa.TIMESTAMP(timezone=True), TIMESTAMP_USING),
+    'network_attach_time': (sa.String(length=64), sa.TIMESTAMP(timezone=True), TIMESTAMP_USING),
+    'thirty_days_avg': (sa.String(length=10), sa.Numeric(6, 2), NUMERIC_USING),
+    'thirty_days_max': (sa.String(length=10), sa.Numeric(6, 2), NUMERIC_USING),
+    'thirty_days_min': (sa.String(length=10), sa.Numeric(6, 2), NUMERIC_USING),
+    'sixty_days_avg': (sa.String(length=10), sa.Numeric(6, 2), NUMERIC_USING),
+    'sixty_days_max': (sa.String(length=10), sa.Numeric(6, 2), NUMERIC_USING),
+    'sixty_days_min': (sa.String(length=10), sa.Numeric(6, 2), NUMERIC_USING),
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Stored timestamps without an offset were written in UTC (GMT for last_transition_date).
+    op.execute("SET LOCAL TIME ZONE 'UTC'")
+    for col, (old_type, new_type, using) in COLUMNS.items():
+        op.alter_column('ec2_instances', col,
+                   existing_type=old_type,
+                   type_=new_type,
+                   existing_nullable=True,
+                   postgresql_using=using.format(col=col))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("SET LOCAL TIME ZONE 'UTC'")
+    for col, (old_type, new_type, _) in COLUMNS.items():
+        op.alter_column('ec2_instances', col,
+                   existing_type=new_type,
+                   type_=old_type,
+                   existing_nullable=True,
+                   postgresql_using=f"COALESCE({col}::text, 'N/A')")
@@ -0,0 +1,30 @@
+from datetime import datetime, timedelta, timezone
+import boto3
+from core.aws_connector import AWSConnector
+
+
+def metadata(access_key, expires_in):
+    return {
+        "access_key": access_key, "secret_key": "secret", "token": "token",
+        "expiry_time": (datetime.now(timezone.utc) + expires_in).isoformat(),
+    }
+
+
+def test_assumed_role_session_uses_and_refreshes_the_role_credentials(monkeypatch):
+    connector = AWSConnector(region_name="us-east-1")
+    calls = []
+
+    def get_role_credentials(account_id, role_name, session, force_refresh=False):
+        calls.append(force_refresh)
+        # The first credentials are about to expire, so botocore refreshes them on use.
+        return metadata("AKIAREFRESHED", timedelta(hours=1)) if force_refresh else metadata("AKIAFIRST", timedelta(minutes=5))
+
+    monkeypatch.setattr(connector, "_get_role_credentials", get_role_credentials)
+    base_session = boto3.Session(aws_access_key_id="base", aws_secret_access_key="base", region_name="us-east-1")
+    account_session = connector.assume_role("111111111111", "FinOpsRole", base_session)
+
+    credentials = account_session.get_credentials()
+    assert credentials.method == "sts-assume-role"
+    assert credentials.get_frozen_credentials().access_key == "AKIAREFRESHED"
+    assert calls == [False, True]
+    assert connector.assume_role("111111111111", "FinOpsRole", base_session) is account_session
@@ -0,0 +1,73 @@
+from datetime import datetime, timezone
+import pytest
+from core.ebs_service import EBSService
+from db.init_db import Session
+from db.models import Account, EBSVolume, EBSVolumeAttachment
+
+ACCOUNT_ID = "111111111111"
+REGION = "us-east-1"
+
+
+def volume(volume_id, instance_id=None):
+    attachments = [{"InstanceId": instance_id, "Device": "/dev/xvda", "State": "attached"}] if instance_id else []
+    return {
+        "VolumeId": volume_id, "VolumeType": "gp3", "Size": 8, "AvailabilityZone": "us-east-1a",
+        "State": "in-use" if instance_id else "available", "Attachments": attachments,
+        "CreateTime": datetime(2026, 1, 1, tzinfo=timezone.utc),
+    }
+
+
+class FakeEC2:
+    """describe_volumes paginator over scripted pages; an Exception in the pages is raised when reached."""
+
+    def __init__(self, pages):
+        self.pages = pages
+
+    def client(self, service_name, region_name=None):
+        return self
+
+    def get_paginator(self, name):
+        return self
+
+    def paginate(self, **kwargs):
+        for page in self.pages:
+            if isinstance(page, Exception):
+                raise page
+            yield {"Volumes": page}
+
+
+def collect(pages):
+    return EBSService(FakeEC2(pages), REGION, ACCOUNT_ID).fetch_properties()
+
+
+def stored():
+    session = Session()
+    try:
+        volumes = {row.volume_id for row in session.query(EBSVolume)}
+        attachments = {(row.volume_id, row.instance_id) for row in session.query(EBSVolumeAttachment)}
+        return volumes, attachments
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def account(database):
+    session = Session()
+    session.add(Account(account_id=ACCOUNT_ID))
+    session.commit()
+    session.close()
+
+
+def test_volumes_deleted_in_aws_are_removed_after_a_full_pass(account):
+    collect([[volume("vol-1", "i-1"), volume("vol-2", "i-2")], [volume("vol-3")]])
+    assert stored() == ({"vol-1", "vol-2", "vol-3"}, {("vol-1", "i-1"), ("vol-2", "i-2")})
+
+    collect([[volume("vol-1", "i-1")], [volume("vol-3")]])
+    assert stored() == ({"vol-1", "vol-3"}, {("vol-1", "i-1")})
+
+
+def test_an_incomplete_pass_removes_nothing(account):
+    collect([[volume("vol-1", "i-1"), volume("vol-2", "i-2")]])
+
+    assert collect([[volume("vol-1", "i-1")], RuntimeError("throttled")]) is None
+    assert stored() == ({"vol-1", "vol-2"}, {("vol-1", "i-1"), ("vol-2", "i-2")})
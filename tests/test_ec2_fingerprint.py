@@ -0,0 +1,97 @@
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+import threading
+import time
+import boto3
+from core import ec2_service
+from core.ec2_service import EC2Service, compute_instance_fingerprint
+from db.init_db import Session
+from db.models import Account, EC2Instance
+
+ACCOUNT_ID = "111111111111"
+REGION = "us-east-1"
+
+
+def make_service():
+    session = boto3.Session(aws_access_key_id="test", aws_secret_access_key="test", region_name=REGION)
+    return EC2Service(session, REGION, ACCOUNT_ID)
+
+
+def instance_record(aging, thirty_days_avg, instance_id="i-0123456789abcdef0"):
+    record = {
+        "instance_id": instance_id, "account_id": ACCOUNT_ID, "region": REGION,
+        "instance_type": "m5.large", "state": "running", "tag_properties": {"team": "finops"},
+        "aging": aging, "thirty_days_avg": thirty_days_avg, "thirty_days_max": 40, "thirty_days_min": 1,
+        "sixty_days_avg": 11, "sixty_days_max": 40, "sixty_days_min": 1,
+    }
+    record["fingerprint"] = compute_instance_fingerprint(record)
+    return record
+
+
+def stored_instance():
+    session = Session()
+    try:
+        return session.query(EC2Instance).one()
+    finally:
+        session.close()
+
+
+def add_account():
+    session = Session()
+    session.add(Account(account_id=ACCOUNT_ID))
+    session.commit()
+    session.close()
+
+
+def test_unchanged_instance_skips_the_upsert_on_the_next_day(database):
+    add_account()
+
+    first = make_service().write_records([instance_record(aging=10, thirty_days_avg=12.5)])
+    assert (first["inserted"], first["refreshed"]) == (1, 0)
+    fingerprint = stored_instance().fingerprint
+
+    # Next day: a day older and new CPU windows, nothing else changed.
+    record = instance_record(aging=11, thirty_days_avg=13.25)
+    assert record["fingerprint"] == fingerprint
+    second = make_service().write_records([record])
+    assert second == {"inserted": 0, "updated": 0, "unchanged": 1, "refreshed": 1}
+    stored = stored_instance()
+    assert (stored.aging, stored.thirty_days_avg) == (11, Decimal("13.25"))
+
+    # Volatile columns already current: nothing is written at all.
+    third = make_service().write_records([record])
+    assert third == {"inserted": 0, "updated": 0, "unchanged": 1, "refreshed": 0}
+
+
+def test_concurrent_pages_share_one_fingerprint_map(database, monkeypatch):
+    add_account()
+    loads = []
+    load = ec2_service.load_instance_fingerprints
+
+    def slow_load(account_id):
+        loads.append(threading.current_thread().name)
+        time.sleep(0.05)
+        return load(account_id)
+
+    monkeypatch.setattr(ec2_service, "load_instance_fingerprints", slow_load)
+    service = make_service()
+    pages = [[instance_record(10, 12.5, instance_id=f"i-{page:02d}{row:015d}") for row in range(5)] for page in range(8)]
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        counts = list(executor.map(service.write_records, pages))
+
+    assert len(loads) == 1
+    assert sum(page_counts["inserted"] for page_counts in counts) == 40
+    assert len(service._fingerprints) == 40
+
+
+def test_instance_without_cpu_metrics_is_written_twice(database):
+    add_account()
+    # A stopped or just-launched instance has no CPU windows yet.
+    record = instance_record(aging=0, thirty_days_avg=None)
+    for column in ec2_service.VOLATILE_COLUMNS[1:]:
+        record[column] = None
+
+    assert make_service().write_records([record])["inserted"] == 1
+    assert make_service().write_records([dict(record, aging=1)]) == {"inserted": 0, "updated": 0, "unchanged": 1, "refreshed": 1}
+    stored = stored_instance()
+    assert (stored.aging, stored.thirty_days_avg) == (1, None)
@@ -0,0 +1,85 @@
+from datetime import date, datetime, time, timedelta, timezone
+from core.metric_rollup import store_missing_days
+from db.bulk import bulk_upsert
+from db.init_db import Session
+from db.models import InstanceMetricDaily
+
+INSTANCE_ID = "i-0123456789abcdef0"
+METRIC = "CPUUtilization"
+TODAY = date(2026, 3, 31)
+WINDOW_START = TODAY - timedelta(days=30)
+
+
+class FakeCloudWatch:
+    """GetMetricData stand-in returning one datapoint per day from `daily`, recording each StartTime."""
+
+    def __init__(self, daily):
+        self.daily = daily
+        self.start_days = []
+
+    def get_paginator(self, name):
+        return self
+
+    def paginate(self, MetricDataQueries, StartTime, EndTime, ScanBy):
+        self.start_days.append(StartTime.date())
+        days = [day for day in sorted(self.daily) if StartTime.date() <= day < EndTime.date()]
+        stamps = [datetime.combine(day, time.min, tzinfo=timezone.utc) for day in days]
+        yield {"MetricDataResults": [
+            {"Id": query["Id"], "Timestamps": stamps, "Values": [self.daily[day] for day in days]}
+            for query in MetricDataQueries
+        ]}
+
+
+def store_days(days, sample_count=1.0):
+    bulk_upsert(InstanceMetricDaily, [
+        {"instance_id": INSTANCE_ID, "metric_name": METRIC, "day": day,
+         "average": 1.0 if sample_count else None, "maximum": 1.0 if sample_count else None,
+         "minimum": 1.0 if sample_count else None, "sample_count": sample_count}
+        for day in days
+    ], key=("instance_id", "metric_name", "day"))
+
+
+def stored_days():
+    session = Session()
+    try:
+        rows = session.query(InstanceMetricDaily).filter(InstanceMetricDaily.instance_id == INSTANCE_ID)
+        return {row.day: row.sample_count for row in rows}
+    finally:
+        session.close()
+
+
+def days_between(start, end):
+    return [start + timedelta(days=offset) for offset in range((end - start).days)]
+
+
+def test_days_missing_before_the_earliest_stored_day_are_backfilled(database):
+    # Only the last 10 days are stored, e.g. after the window grew from 10 to 30 days.
+    store_days(days_between(TODAY - timedelta(days=10), TODAY))
+    cloudwatch = FakeCloudWatch({day: 5.0 for day in days_between(WINDOW_START, TODAY)})
+
+    store_missing_days(cloudwatch, [INSTANCE_ID], METRIC, WINDOW_START, TODAY)
+    assert cloudwatch.start_days == [WINDOW_START]
+    assert stored_days() == {day: 5.0 for day in days_between(WINDOW_START, TODAY)}
+
+
+def test_recent_days_are_refetched_for_late_datapoints(database):
+    store_days(days_between(WINDOW_START, TODAY))
+    cloudwatch = FakeCloudWatch({TODAY - timedelta(days=1): 7.0})
+
+    store_missing_days(cloudwatch, [INSTANCE_ID], METRIC, WINDOW_START, TODAY)
+    assert cloudwatch.start_days == [TODAY - timedelta(days=2)]
+    assert stored_days()[TODAY - timedelta(days=1)] == 7.0
+
+
+def test_recent_empty_days_are_refetched(database):
+    empty_day = TODAY - timedelta(days=5)
+    store_days(days_between(WINDOW_START, TODAY))
+    store_days([empty_day], sample_count=0)
+    store_days([WINDOW_START], sample_count=0)
+    cloudwatch = FakeCloudWatch({empty_day: 3.0})
+
+    store_missing_days(cloudwatch, [INSTANCE_ID], METRIC, WINDOW_START, TODAY)
+    # The recent empty day is fetched again; the old one is not.
+    assert cloudwatch.start_days == [empty_day]
+    stored = stored_days()
+    assert (stored[empty_day], stored[WINDOW_START]) == (3.0, 0)
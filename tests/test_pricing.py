@@ -0,0 +1,66 @@
+import pandas as pd
+import pytest
+from core.pricing import COMPUTE_KEY, STORAGE_KEY, PriceCatalog, estimate_costs
+
+REGION = "us-east-1"
+
+
+@pytest.fixture
+def catalog():
+    compute = pd.DataFrame(
+        [(REGION, "m5.large", "RunInstances", 0.1)], columns=COMPUTE_KEY + ["hourly_price"]
+    ).set_index(COMPUTE_KEY)
+    storage = pd.DataFrame(
+        [(REGION, "gp3", 0.08), (REGION, "io2", 0.125)], columns=STORAGE_KEY + ["gb_month_price"]
+    ).set_index(STORAGE_KEY)
+    return PriceCatalog(compute, storage)
+
+
+def instance(instance_id, volume_id, volume_type, volume_size, instance_type="m5.large"):
+    return {
+        "instance_id": instance_id, "account_id": "111111111111", "region": REGION, "instance_type": instance_type,
+        "state": "running", "usage_operation": "RunInstances",
+        "volume_id": volume_id, "volume_type": volume_type, "volume_size": volume_size,
+    }
+
+
+def estimates_by_instance(inventory, catalog, volumes=None):
+    frame = estimate_costs(pd.DataFrame(inventory), catalog, hours_per_month=100, volumes=volumes)
+    frame = frame.astype(object).where(frame.notna(), None)
+    return {row["instance_id"]: (row["storage_monthly"], row["total_monthly"]) for row in frame.to_dict("records")}
+
+
+def test_storage_is_priced_per_volume(catalog):
+    inventory = [
+        # gp3 root plus an io2 data volume; volume_type only holds the first.
+        instance("i-mixed", "vol-1, vol-2", "gp3", 600),
+        instance("i-single", "vol-3", "gp3", 50),
+    ]
+    volumes = pd.DataFrame([
+        ("i-mixed", "vol-1", REGION, "gp3", 100),
+        ("i-mixed", "vol-2", REGION, "io2", 500),
+    ], columns=["instance_id", "volume_id", "region", "volume_type", "size_gb"])
+
+    estimates = estimates_by_instance(inventory, catalog, volumes)
+    assert estimates["i-mixed"] == (70.5, 80.5)
+    # No volume rows: a single volume is priced from the collected type and size.
+    assert estimates["i-single"] == (4.0, 14.0)
+
+
+def test_total_is_null_when_any_part_is_unpriced(catalog):
+    inventory = [
+        instance("i-unknown-type", "vol-1", "gp3", 100, instance_type="x9.large"),
+        instance("i-unknown-volume", "vol-2, vol-3", "gp3", 200),
+        instance("i-multi-without-rows", "vol-4, vol-5", "gp3", 200),
+    ]
+    volumes = pd.DataFrame([
+        ("i-unknown-volume", "vol-2", REGION, "gp3", 100),
+        ("i-unknown-volume", "vol-3", REGION, "standard", 100),
+    ], columns=["instance_id", "volume_id", "region", "volume_type", "size_gb"])
+
+    estimates = estimates_by_instance(inventory, catalog, volumes)
+    assert estimates == {
+        "i-unknown-type": (8.0, None),
+        "i-unknown-volume": (None, None),
+        "i-multi-without-rows": (None, None),
+    }
@@ -0,0 +1,42 @@
+import importlib.util
+import os
+from sqlalchemy import text
+import config
+
+MIGRATION = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "migrations", "versions", "6e4a2c9f1d07_fleet_summary_idle_count_matches_rightsizing.py",
+)
+
+
+def load_migration():
+    spec = importlib.util.spec_from_file_location("fleet_summary_migration", MIGRATION)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_fleet_summary_idle_count_uses_the_rightsizing_thresholds():
+    idle_thresholds = {key: value for key, value in config.RIGHTSIZING_THRESHOLDS.items() if key.startswith("idle_")}
+    assert load_migration().IDLE_THRESHOLDS == idle_thresholds
+
+
+def test_fleet_summary_counts_the_instances_rightsizing_calls_idle(database):
+    migration = load_migration()
+    rows = [
+        ("i-idle", "running", 1.0, 3.0),
+        # Average below 5% but spiking: not idle for rightsizing.
+        ("i-spiky", "running", 1.0, 80.0),
+        ("i-stopped", "stopped", 0.0, 0.0),
+    ]
+    with database.begin() as connection:
+        for instance_id, state, avg_30, max_30 in rows:
+            connection.execute(text(
+                "INSERT INTO ec2_instances (instance_id, account_id, region, instance_type, state, thirty_days_avg, thirty_days_max)"
+                " VALUES (:instance_id, NULL, 'us-east-1', 'm5.large', :state, :avg_30, :max_30)"
+            ), {"instance_id": instance_id, "state": state, "avg_30": avg_30, "max_30": max_30})
+        connection.execute(text("DROP MATERIALIZED VIEW IF EXISTS mv_ec2_fleet_summary"))
+        connection.execute(text(migration.EC2_FLEET_SUMMARY_SQL.format(idle=migration.IDLE_CONDITION)))
+        idle_count = connection.execute(text("SELECT sum(idle_count) FROM mv_ec2_fleet_summary")).scalar()
+        connection.execute(text("DROP MATERIALIZED VIEW mv_ec2_fleet_summary"))
+    assert idle_count == 1
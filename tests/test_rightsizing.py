@@ -0,0 +1,36 @@
+import pandas as pd
+from core.rightsizing import analyze_rightsizing, downsize, family_min_size
+
+THRESHOLDS = {'idle_avg': 2, 'idle_max': 5, 'underutilized_avg': 10, 'underutilized_max': 40, 'oversized_max': 60}
+
+
+def inventory(*rows):
+    return pd.DataFrame([
+        {'instance_id': instance_id, 'account_id': '111111111111', 'region': 'us-east-1', 'instance_type': instance_type,
+         'state': 'running', 'thirty_days_avg': avg_30, 'thirty_days_max': max_30, 'sixty_days_max': max_60}
+        for instance_id, instance_type, avg_30, max_30, max_60 in rows
+    ])
+
+
+def test_family_min_size():
+    assert family_min_size('t3a') == 'nano'
+    assert family_min_size('t4g') == 'nano'
+    # Trainium, not burstable.
+    assert family_min_size('trn1') == 'large'
+    assert family_min_size('c7gn') == 'medium'
+    assert downsize('trn1.2xlarge', 2) == 'trn1.large'
+    assert downsize('c7gn.medium', 1) is None
+
+
+def test_instances_without_a_smaller_type_get_no_recommendation():
+    flagged = analyze_rightsizing(inventory(
+        ('i-idle', 'c7gn.medium', 1, 3, 3),
+        ('i-over', 'c7gn.medium', 30, 50, 50),
+        ('i-under', 'm5.large', 5, 20, 20),
+        ('i-over-resizable', 'm5.2xlarge', 30, 50, 50),
+    ), THRESHOLDS)
+    rows = {
+        row.instance_id: (row.recommendation, row.recommended_type if pd.notna(row.recommended_type) else None)
+        for row in flagged.itertuples()
+    }
+    assert rows == {'i-idle': ('idle', None), 'i-over-resizable': ('oversized', 'm5.xlarge')}
@@ -0,0 +1,61 @@
+from core.ebs_service import EBSService
+from core.lambda_service import LambdaService
+from core.service_base import ServiceBase
+
+
+class FakeSession:
+    """Session whose clients answer every call with `response`, or raise it when it is an exception."""
+
+    def __init__(self, response):
+        self.response = response
+        self.clients = []
+
+    def client(self, service_name, region_name=None):
+        self.clients.append((service_name, region_name))
+        return self
+
+    def __getattr__(self, name):
+        def _call(**kwargs):
+            if isinstance(self.response, Exception):
+                raise self.response
+            return self.response
+        return _call
+
+
+def test_probe_answers_whether_the_region_has_resources():
+    session = FakeSession({"Volumes": [], "NextToken": None})
+    assert EBSService.has_resources(session, "eu-west-1") is False
+    assert session.clients == [("ec2", "eu-west-1")]
+    assert LambdaService.has_resources(FakeSession({"Functions": [{"FunctionName": "f"}]}), "eu-west-1") is True
+
+
+def test_failed_or_missing_probe_keeps_the_region():
+    assert EBSService.has_resources(FakeSession(RuntimeError("AccessDenied")), "eu-west-1") is True
+    assert ServiceBase.has_resources(FakeSession(RuntimeError("never called")), "eu-west-1") is True
+
+
+class PagedService(ServiceBase):
+    """Collector implementing only iter_pages and write_records."""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.written = []
+
+    def iter_pages(self):
+        for page in self.pages:
+            if isinstance(page, Exception):
+                raise page
+            yield page
+
+    def write_records(self, records):
+        self.written.append(records)
+
+
+def test_fetch_properties_writes_every_page():
+    service = PagedService([[{"id": 1}, {"id": 2}], [{"id": 3}]])
+    assert service.fetch_properties() == [{"id": 1}, {"id": 2}, {"id": 3}]
+    assert service.written == [[{"id": 1}, {"id": 2}], [{"id": 3}]]
+
+
+def test_fetch_properties_reports_a_failed_page_as_none():
+    assert PagedService([[{"id": 1}], RuntimeError("throttled")]).fetch_properties() is None
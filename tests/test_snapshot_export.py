@@ -0,0 +1,64 @@
+from datetime import datetime, timezone
+import pytest
+
+pytest.importorskip("pyarrow")
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from core.snapshot_export import SnapshotExporter
+
+ACCOUNT_ID = "111111111111"
+REGION = "us-east-1"
+
+
+def read_snapshot(base_dir, service):
+    return ds.dataset(str(base_dir / service), partitioning="hive").to_table().to_pylist()
+
+
+def test_lambda_functions_are_exported(tmp_path):
+    exporter = SnapshotExporter("run-1", str(tmp_path))
+    exporter("lambda", ACCOUNT_ID, REGION, [{
+        "function_arn": f"arn:aws:lambda:{REGION}:{ACCOUNT_ID}:function:resize", "function_name": "resize",
+        "account_id": ACCOUNT_ID, "region": REGION, "runtime": "python3.12", "architectures": "arm64",
+        "memory_size": 512, "code_size": 5_000_000_000, "last_modified": datetime(2026, 1, 2, tzinfo=timezone.utc),
+        "metric_window_days": 30, "invocations": 12, "errors": 0, "avg_duration_ms": None,
+    }])
+    exporter.close()
+
+    (row,) = read_snapshot(tmp_path, "lambda")
+    assert (row["function_name"], row["runtime"], row["code_size"], row["invocations"]) == ("resize", "python3.12", 5_000_000_000, 12.0)
+    assert (str(row["account_id"]), row["region"], row["run_id"]) == (ACCOUNT_ID, REGION, "run-1")
+
+
+def test_ebs_volumes_are_exported(tmp_path):
+    exporter = SnapshotExporter("run-1", str(tmp_path))
+    exporter("ebs", ACCOUNT_ID, REGION, [{
+        "volume_id": "vol-1", "account_id": ACCOUNT_ID, "region": REGION, "volume_type": "gp3", "size_gb": 100,
+        "encrypted": True, "state": "available", "tag_properties": {"team": "finops"},
+        "is_orphaned": True, "detached_since": datetime(2026, 1, 2, tzinfo=timezone.utc), "detached_days": 40,
+        "long_detached": True, "attachments": [],
+    }])
+    exporter.close()
+
+    (row,) = read_snapshot(tmp_path, "ebs")
+    assert (row["volume_id"], row["volume_type"], row["size_gb"], row["encrypted"], row["long_detached"]) == ("vol-1", "gp3", 100, True, True)
+    assert row["tag_properties"] == [("team", "finops")]
+
+
+def test_pages_are_written_as_one_file_per_partition(tmp_path):
+    exporter = SnapshotExporter("run-1", str(tmp_path), row_group_rows=4)
+    for page in range(5):
+        exporter("lambda", ACCOUNT_ID, REGION, [
+            {"function_arn": f"arn-{page}-{row}", "function_name": f"fn-{page}-{row}", "account_id": ACCOUNT_ID, "region": REGION}
+            for row in range(3)
+        ])
+    exporter("lambda", ACCOUNT_ID, "eu-west-1", [{"function_arn": "arn-eu", "function_name": "fn-eu", "region": "eu-west-1"}])
+    # Only the us-east-1 partition has reached a full row group so far.
+    assert len(list(tmp_path.rglob("*.parquet"))) == 1
+    summary = exporter.close()
+
+    files = sorted(tmp_path.rglob("*.parquet"))
+    assert (summary["files"], summary["rows"], len(files)) == (2, 16, 2)
+    us_file = next(path for path in files if "region=us-east-1" in str(path))
+    # 15 rows flushed at 6, 12 and the last 3 on close.
+    assert pq.ParquetFile(us_file).metadata.num_row_groups == 3
+    assert len(read_snapshot(tmp_path, "lambda")) == 16
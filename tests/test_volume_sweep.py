@@ -0,0 +1,80 @@
+import threading
+import pytest
+from core.ebs_service import EBSService
+from core.ec2_service import build_volume_index
+from core.volume_sweep import VolumeSweepCache
+
+ACCOUNT_ID = "111111111111"
+REGION = "us-east-1"
+VOLUMES = [{"VolumeId": f"vol-{idx}", "Size": 8, "State": "available"} for idx in range(3)]
+
+
+class CountingEC2:
+    """describe_volumes paginator that counts its sweeps."""
+
+    def __init__(self):
+        self.sweeps = 0
+        self.meta = type("Meta", (), {"region_name": REGION})()
+
+    def get_paginator(self, name):
+        return self
+
+    def paginate(self, **kwargs):
+        self.sweeps += 1
+        yield {"Volumes": VOLUMES}
+
+
+class SharingConnector:
+    def __init__(self, client):
+        self.client = client
+        self.volume_sweeps = VolumeSweepCache()
+
+    def get_client(self, session, service_name, region_name=None, account_id=None):
+        return self.client
+
+
+def test_ec2_and_ebs_collectors_share_one_sweep_per_region(monkeypatch):
+    monkeypatch.setattr("core.ebs_service.delete_volumes", lambda volume_ids: 0)
+    client = CountingEC2()
+    connector = SharingConnector(client)
+
+    index = build_volume_index(client, ACCOUNT_ID, REGION, connector)
+    ebs = EBSService(None, REGION, ACCOUNT_ID, connector=connector)
+    ebs._detached_since = {}
+    pages = list(ebs.iter_pages())
+
+    assert sorted(index) == [volume["VolumeId"] for volume in VOLUMES]
+    assert [record["volume_id"] for page in pages for record in page] == [volume["VolumeId"] for volume in VOLUMES]
+    assert client.sweeps == 1
+    # Another region, or an expired sweep, is described again.
+    build_volume_index(client, ACCOUNT_ID, "eu-west-1", connector)
+    assert client.sweeps == 2
+
+
+def test_concurrent_callers_wait_for_one_sweep():
+    client = CountingEC2()
+    cache = VolumeSweepCache()
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get(client, ACCOUNT_ID, REGION))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert client.sweeps == 1 and len(results) == 4
+
+
+def test_failed_sweeps_are_not_kept():
+    client = CountingEC2()
+    cache = VolumeSweepCache()
+    calls = []
+
+    def paginate(**kwargs):
+        calls.append(kwargs)
+        if len(calls) == 1:
+            raise RuntimeError("throttled")
+        yield {"Volumes": VOLUMES}
+
+    client.paginate = paginate
+    with pytest.raises(RuntimeError):
+        cache.get(client, ACCOUNT_ID, REGION)
+    assert cache.get(client, ACCOUNT_ID, REGION) == VOLUMES
@@ -0,0 +1,126 @@
+"""Work queue tests with real worker processes sharing one PostgreSQL database."""
+
+import multiprocessing
+import os
+import signal
+import time
+from datetime import timedelta
+from sqlalchemy import func, update
+from core.work_queue import WorkQueue, run_worker
+from db.init_db import Session, get_engine
+from db.models import WorkItem
+import config
+
+RUN_ID = "queue-test"
+# Fork keeps the test importable as-is; each child opens its own connections.
+FORK = multiprocessing.get_context("fork")
+
+
+class RecordingRunner:
+    """Stands in for AWSServiceRunner.run_unit; scripted outcomes per service, default success."""
+
+    def __init__(self, outcomes=None, delay=0.0):
+        self.outcomes = outcomes or {}
+        self.delay = delay
+        self.units = []
+
+    def run_unit(self, account, region, service):
+        time.sleep(self.delay)
+        self.units.append((account["Id"], region, service))
+        outcome = self.outcomes.get(service, [[{"id": 1}]])
+        return outcome.pop(0) if len(outcome) > 1 else outcome[0]
+
+
+def seed(units):
+    queue = WorkQueue(RUN_ID)
+    assert queue.enqueue(units) == len(units)
+    return queue
+
+
+def _worker_process(worker_id, results):
+    # Connections inherited from the parent must not be shared with it.
+    get_engine().dispose(close=False)
+    runner = RecordingRunner(delay=0.01)
+    counts = run_worker(WorkQueue(RUN_ID), runner, worker_id=worker_id, threads=2, poll_seconds=0.05)
+    results.put((worker_id, counts, runner.units))
+
+
+def _claim_and_hang(claimed):
+    get_engine().dispose(close=False)
+    claimed.put(WorkQueue(RUN_ID).claim("doomed-worker"))
+    time.sleep(600)
+
+
+def items():
+    session = Session()
+    try:
+        return {
+            (item.account_id, item.region, item.service): item
+            for item in session.query(WorkItem).filter(WorkItem.run_id == RUN_ID)
+        }
+    finally:
+        session.close()
+
+
+def test_workers_claim_every_item_exactly_once(database):
+    units = [(f"{account:012d}", region, service)
+             for account in range(5) for region in ("us-east-1", "eu-west-1") for service in ("ec2", "s3", "ebs")]
+    seed(units)
+
+    results = FORK.Queue()
+    workers = [FORK.Process(target=_worker_process, args=(f"worker-{idx}", results)) for idx in range(4)]
+    for worker in workers:
+        worker.start()
+    reports = [results.get(timeout=60) for _ in workers]
+    for worker in workers:
+        worker.join(timeout=10)
+        assert worker.exitcode == 0
+
+    collected = [unit for _, _, worker_units in reports for unit in worker_units]
+    assert sorted(collected) == sorted(units)
+    assert sum(counts["done"] for _, counts, _ in reports) == len(units)
+    # Work was spread across processes, not drained by the first one.
+    assert sum(1 for _, counts, _ in reports if counts["done"]) > 1
+    stored = items()
+    assert {item.status for item in stored.values()} == {"done"}
+    assert {item.attempts for item in stored.values()} == {1}
+
+
+def test_killed_workers_claim_is_reclaimed(database):
+    units = [("000000000001", "us-east-1", "ec2"), ("000000000001", "us-east-1", "s3")]
+    seed(units)
+
+    claimed = FORK.Queue()
+    doomed = FORK.Process(target=_claim_and_hang, args=(claimed,))
+    doomed.start()
+    (doomed_item,) = claimed.get(timeout=30)
+    os.kill(doomed.pid, signal.SIGKILL)
+    doomed.join(timeout=10)
+
+    # Let the dead worker's heartbeat go stale.
+    session = Session()
+    session.execute(update(WorkItem).where(WorkItem.id == doomed_item[0]).values(
+        heartbeat_at=func.now() - timedelta(seconds=config.WORK_QUEUE_STALE_SECONDS + 1)
+    ))
+    session.commit()
+    session.close()
+
+    counts = run_worker(WorkQueue(RUN_ID), RecordingRunner(), worker_id="survivor", threads=1, poll_seconds=0.05)
+    assert counts == {"done": 2, "failed": 0, "retried": 0, "lost": 0}
+    reclaimed = items()[tuple(doomed_item[1:])]
+    assert (reclaimed.status, reclaimed.worker_id, reclaimed.attempts) == ("done", "survivor", 2)
+
+
+def test_failed_items_are_retried_until_out_of_attempts(database, monkeypatch):
+    monkeypatch.setattr(config, "WORK_QUEUE_MAX_ATTEMPTS", 3)
+    seed([("000000000001", "us-east-1", "flaky"), ("000000000001", "us-east-1", "broken")])
+    # run_unit returns None when the collector failed.
+    runner = RecordingRunner({"flaky": [None, [{"id": 1}]], "broken": [None]})
+
+    counts = run_worker(WorkQueue(RUN_ID), runner, worker_id="w", threads=1, poll_seconds=0.05)
+    assert counts == {"done": 1, "failed": 1, "retried": 3, "lost": 0}
+    stored = items()
+    flaky, broken = stored[("000000000001", "us-east-1", "flaky")], stored[("000000000001", "us-east-1", "broken")]
+    assert (flaky.status, flaky.attempts, flaky.records) == ("done", 2, 1)
+    assert (broken.status, broken.attempts) == ("failed", 3)
+    assert broken.error == "collection failed"
@@ -0,0 +1,176 @@
+# /utils/telemetry.py
+"""Per-API call and DB flush telemetry, written as a machine-readable run report."""
+
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+import json
+import os
+import threading
+import time
+from utils.logger import logger
+
+# Upper bounds in milliseconds; the last bucket catches everything slower.
+LATENCY_BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, float('inf'))
+
+
+class LatencyStats:
+    """Count, total, max and a fixed-bucket histogram of latencies in milliseconds."""
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.histogram = [0] * len(LATENCY_BUCKETS_MS)
+
+    def add(self, latency_ms):
+        self.count += 1
+        self.total_ms += latency_ms
+        self.max_ms = max(self.max_ms, latency_ms)
+        self.histogram[next(idx for idx, bound in enumerate(LATENCY_BUCKETS_MS) if latency_ms <= bound)] += 1
+
+    def percentile(self, fraction):
+        """Returns the upper bound of the bucket holding the given fraction of samples."""
+        threshold = fraction * self.count
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS_MS, self.histogram):
+            seen += count
+            if count and seen >= threshold:
+                return bound if bound != float('inf') else round(self.max_ms, 1)
+        return None
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'total_ms': round(self.total_ms, 1),
+            'avg_ms': round(self.total_ms / self.count, 1) if self.count else None,
+            'max_ms': round(self.max_ms, 1),
+            'p50_ms': self.percentile(0.5),
+            'p95_ms': self.percentile(0.95),
+            'histogram': {
+                ('le_inf' if bound == float('inf') else f"le_{bound}"): count
+                for bound, count in zip(LATENCY_BUCKETS_MS, self.histogram)
+            },
+        }
+
+
+class Telemetry:
+    """Collects per (account, region, operation) API statistics and named DB timings."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started_at = datetime.now(timezone.utc)
+        self._api = defaultdict(lambda: {
+            'errors': 0, 'retries': 0, 'request_bytes': 0, 'response_bytes': 0, 'latency': LatencyStats(),
+        })
+        self._timings = defaultdict(LatencyStats)
+
+    def register(self, client, account_id, region):
+        """Hooks before-call/after-call events of a botocore client into the collector."""
+        service_id = client.meta.service_model.service_id.hyphenize()
+        account_key = account_id or 'base'
+
+        def _key(event_name):
+            # Event names look like 'after-call.ec2.DescribeInstances'.
+            return (account_key, region, event_name.split('.', 1)[1])
+
+        def before_call(context=None, **kwargs):
+            if context is not None:
+                context['finops_started'] = time.perf_counter()
+
+        def before_send(event_name=None, request=None, **kwargs):
+            body = getattr(request, 'body', None)
+            size = len(body) if isinstance(body, (bytes, str)) else 0
+            with self._lock:
+                self._api[_key(event_name)]['request_bytes'] += size
+
+        def after_call(event_name=None, http_response=None, parsed=None, model=None, context=None, **kwargs):
+            started = (context or {}).get('finops_started')
+            retries = (parsed or {}).get('ResponseMetadata', {}).get('RetryAttempts', 0)
+            size = 0
+            if http_response is not None:
+                size = int(http_response.headers.get('content-length', 0) or 0)
+                # Non-streaming bodies are already in memory; never touch a streaming one.
+                if not size and model is not None and not model.has_streaming_output:
+                    size = len(http_response.content or b'')
+            with self._lock:
+                stats = self._api[_key(event_name)]
+                stats['retries'] += retries
+                stats['response_bytes'] += size
+                if started is not None:
+                    stats['latency'].add((time.perf_counter() - started) * 1000)
+
+        def after_call_error(event_name=None, context=None, **kwargs):
+            started = (context or {}).get('finops_started')
+            with self._lock:
+                stats = self._api[_key(event_name)]
+                stats['errors'] += 1
+                if started is not None:
+                    stats['latency'].add((time.perf_counter() - started) * 1000)
+
+        client.meta.events.register(f'before-call.{service_id}.*', before_call)
+        client.meta.events.register(f'before-send.{service_id}.*', before_send)
+        client.meta.events.register(f'after-call.{service_id}.*', after_call)
+        client.meta.events.register(f'after-call-error.{service_id}.*', after_call_error)
+
+    @contextmanager
+    def timed(self, name):
+        """Times the enclosed block under `name`, e.g. 'db.ec2_instances'."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            with self._lock:
+                self._timings[name].add(elapsed_ms)
+
+    def report(self, **extra):
+        """Returns the run report as a JSON-serialisable dict; extra keys are added at the top level."""
+        with self._lock:
+            api = [
+                {
+                    'account_id': account_id,
+                    'region': region,
+                    'operation': operation,
+                    'calls': stats['latency'].count,
+                    'errors': stats['errors'],
+                    'retries': stats['retries'],
+                    'request_bytes': stats['request_bytes'],
+                    'response_bytes': stats['response_bytes'],
+                    'latency': stats['latency'].to_dict(),
+                }
+                for (account_id, region, operation), stats in sorted(self._api.items(), key=lambda item: tuple(map(str, item[0])))
+            ]
+            timings = {name: stats.to_dict() for name, stats in sorted(self._timings.items())}
+        by_service = defaultdict(lambda: {'calls': 0, 'errors': 0, 'retries': 0, 'total_ms': 0.0})
+        for entry in api:
+            service_totals = by_service[entry['operation'].split('.', 1)[0]]
+            service_totals['calls'] += entry['calls']
+            service_totals['errors'] += entry['errors']
+            service_totals['retries'] += entry['retries']
+            service_totals['total_ms'] = round(service_totals['total_ms'] + entry['latency']['total_ms'], 1)
+        finished_at = datetime.now(timezone.utc)
+        return {
+            'started_at': self.started_at.isoformat(),
+            'finished_at': finished_at.isoformat(),
+            'wall_seconds': round((finished_at - self.started_at).total_seconds(), 2),
+            **extra,
+            'api_by_service': dict(by_service),
+            'api': api,
+            'timings': timings,
+        }
+
+    def write_report(self, directory, name=None, **extra):
+        """Writes the report to <directory>/run_report_<started_at>[-<name>].json and returns the path."""
+        os.makedirs(directory, exist_ok=True)
+        suffix = f"-{name}" if name else ""
+        path = os.path.join(directory, f"run_report_{self.started_at.strftime('%Y%m%dT%H%M%SZ')}{suffix}.json")
+        with open(path, 'w', encoding='utf-8') as report_file:
+            json.dump(self.report(**extra), report_file, indent=2, default=str)
+        logger.info("Run report written to %s", path)
+        return path
+
+
+telemetry = Telemetry()
+
+# End-of-file (EOF)